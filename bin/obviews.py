@@ -21,29 +21,27 @@
 
 # https://www.flaticon.com/
 
-from functools import partial
+# Rarely used or heavy modules (cxxfilt, mimetypes, subprocess,
+# tempfile, webbrowser) are imported at first use to keep start-up short.
+from functools import lru_cache, partial
 import argparse
-import datetime
-import glob
+import array
+import bisect
+import collections
+import heapq
 import io
 import json
-import logging
-import mimetypes
+import operator
 import os
 import re
+import select
 import shutil
-import signal
-import subprocess
 import sys
-import tempfile
 import time
 import urllib.parse
-import webbrowser
-import cxxfilt
 
-from http import server
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from threading import Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Event, Lock, Thread
 
 
 ######### global state #########
@@ -52,21 +50,33 @@ DEBUG = False
 DATA_DIR = None
 DOT_PATH = None
 TASK = None
+TASK_ARGS = None
+WATCH = False
+EXPORT = False
+VIEW_LAYERS = False
 
 
 ######### Convenient functions #########
 
-PARAM_RE = re.compile("%([0-9a-fA-F]{2})")
-def parsep(text):
-	res = ""
-	m = PARAM_RE.search(text)
-	while m:
-		res += text[:m.start()]
-		res += chr(int(m[1], 16))
-		text = text[m.end():]
-		m = PARAM_RE.search(text)
-	res += text
-	return res
+class LazyRE:
+	"""Regular expression compiled at its first use."""
+
+	def __init__(self, pattern):
+		self.pattern = pattern
+		self.re = None
+
+	def __getattr__(self, name):
+		if self.re == None:
+			self.re = re.compile(self.pattern)
+		return getattr(self.re, name)
+
+
+@lru_cache(maxsize = 4096)
+def demangle(name):
+	"""Demangle a C++ symbol name."""
+	import cxxfilt
+	return cxxfilt.demangle(name)
+
 
 def error(msg):
 	sys.stderr.write("ERROR: %s\n" % msg)
@@ -74,6 +84,9 @@ def error(msg):
 def warn(msg):
 	sys.stderr.write("WARNING: %s\n" % msg)
 
+def info(msg):
+	sys.stdout.write("INFO: %s\n" % msg)
+
 def fatal(msg):
 	raise FatalError(msg)
 
@@ -101,6 +114,140 @@ class StringBuffer():
 		return ('<?xml version="1.0" encoding="utf8" standalone="yes"?>\n' + self.str).encode("utf-8")
 
 
+class Cache:
+	"""Bounded map of computed values with least-recently-used
+	replacement."""
+
+	def __init__(self, size):
+		self.size = size
+		self.map = collections.OrderedDict()
+		self.lock = Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key):
+		"""Get the value for the key or None."""
+		with self.lock:
+			try:
+				self.map.move_to_end(key)
+				self.hits = self.hits + 1
+				return self.map[key]
+			except KeyError:
+				self.misses = self.misses + 1
+				return None
+
+	def peek(self, key):
+		"""Get the value for the key or None without updating the
+		replacement order nor the hit counts."""
+		with self.lock:
+			return self.map.get(key)
+
+	def put(self, key, value):
+		with self.lock:
+			self.map[key] = value
+			self.map.move_to_end(key)
+			while len(self.map) > self.size:
+				self.map.popitem(last = False)
+
+	def clear(self, pred = None):
+		"""Remove the values whose key matches the predicate
+		(all values if no predicate is given)."""
+		with self.lock:
+			if pred == None:
+				self.map.clear()
+			else:
+				for k in [k for k in self.map if pred(k)]:
+					del self.map[k]
+
+
+class Flight:
+	"""Computation of a SingleFlight: the waiters get its result or its
+	exception once it is done."""
+
+	def __init__(self):
+		self.done = Event()
+		self.result = None
+		self.error = None
+
+	def wait(self):
+		self.done.wait()
+		if self.error != None:
+			raise self.error
+		return self.result
+
+
+class SingleFlight:
+	"""Coordinate the computations of resources (loads, renders) so that
+	a resource is computed once at a time: the first caller asking for
+	a key computes it while concurrent callers for the same key wait on
+	the same flight and share its result or its exception. Nothing is
+	kept once the computation is over: the computation function has to
+	record its result (and to check it has not been recorded just
+	before it is called)."""
+
+	def __init__(self):
+		self.lock = Lock()
+		self.flights = {}
+
+	def do(self, key, fun):
+		"""Get the result of fun() for the key, shared with the concurrent
+		callers for the same key."""
+		with self.lock:
+			flight = self.flights.get(key)
+			first = flight == None
+			if first:
+				flight = Flight()
+				self.flights[key] = flight
+		if not first:
+			return flight.wait()
+		try:
+			flight.result = fun()
+			return flight.result
+		except BaseException as e:
+			flight.error = e
+			raise
+		finally:
+			with self.lock:
+				del self.flights[key]
+			flight.done.set()
+
+FLIGHTS = SingleFlight()
+
+
+class RWLock:
+	"""Lock shared by readers and exclusive for a writer."""
+
+	def __init__(self):
+		self.cond = Condition()
+		self.readers = 0
+		self.writing = False
+
+	def acquire_read(self):
+		with self.cond:
+			while self.writing:
+				self.cond.wait()
+			self.readers = self.readers + 1
+
+	def release_read(self):
+		with self.cond:
+			self.readers = self.readers - 1
+			if self.readers == 0:
+				self.cond.notify_all()
+
+	def acquire_write(self):
+		with self.cond:
+			while self.writing:
+				self.cond.wait()
+			self.writing = True
+			while self.readers != 0:
+				self.cond.wait()
+
+	def release_write(self):
+		with self.cond:
+			self.writing = False
+			self.cond.notify_all()
+
+
 class FatalError(Exception):
 	"""Fatal exception in obviews."""
 
@@ -130,17 +277,102 @@ def escape_html(s):
 		replace("\t", "&nbsp;&nbsp;&nbsp;&nbsp;")
 
 
-DEF_RE = re.compile(r"#\s*(\S+):\s*(.*)")
+READ_BUFFER = 1 << 20
+
+def open_gz(file):
+	import gzip
+	return gzip.GzipFile(fileobj = file, mode = "rb")
+
+def open_xz(file):
+	import lzma
+	return lzma.LZMAFile(file)
+
+def open_zst(file):
+	import zstandard
+	return zstandard.ZstdDecompressor().stream_reader(file, read_size = READ_BUFFER)
+
+COMPRESSIONS = {
+	".gz":	open_gz,
+	".xz":	open_xz,
+	".zst":	open_zst
+}
+
+@lru_cache(maxsize = None)
+def get_compressions():
+	"""Get the extensions of the supported compressions (.zst requires
+	the zstandard module)."""
+	import importlib.util
+	exts = [".gz", ".xz"]
+	if importlib.util.find_spec("zstandard") != None:
+		exts.append(".zst")
+	return exts
+
+def find_file(path):
+	"""Find the actual file for path: path itself if it exists or a
+	compressed variant (path with a compression extension). Return path
+	if none exists."""
+	if os.path.exists(path):
+		return path
+	for ext in get_compressions():
+		if os.path.exists(path + ext):
+			return path + ext
+	return path
+
+def uncompressed_name(name):
+	"""Get the name of a file without its compression extension."""
+	for ext in get_compressions():
+		if name.endswith(ext):
+			return name[:-len(ext)]
+	return name
+
+def same_content(path1, path2):
+	"""Test if two files, possibly compressed (see find_file()), have
+	the same uncompressed content."""
+	csv1 = CSV(path1)
+	l1 = csv1.open()
+	try:
+		csv2 = CSV(path2)
+		l2 = csv2.open()
+		try:
+			while l1 == l2 and l1 != None:
+				l1 = csv1.read_line()
+				l2 = csv2.read_line()
+			return l1 == l2
+		finally:
+			csv2.close()
+	finally:
+		csv1.close()
+
+
+DEF_RE = LazyRE(r"#\s*(\S+):\s*(.*)")
 class CSV:
+	"""Reader of CSV files, possibly compressed (see find_file()). The
+	file is decompressed as it is read so that reading the definitions
+	of the header does not decompress the whole file."""
 
 	def __init__(self, path):
 		self.path = path
+		self.actual = find_file(path)
 		self.defs = None
 		self.input = None
+		self.raw = None
 		self.line = None
 
+	def is_compressed(self):
+		return self.actual != self.path
+
+	def size(self):
+		"""Get the size in bytes of the file as stored."""
+		return os.path.getsize(self.actual)
+
 	def open(self):
-		self.input = open(self.path, encoding='utf-8')
+		self.raw = open(self.actual, "rb", buffering = READ_BUFFER)
+		ext = os.path.splitext(self.actual)[1]
+		if self.is_compressed() and ext in COMPRESSIONS:
+			stream = io.BufferedReader(COMPRESSIONS[ext](self.raw), READ_BUFFER)
+		else:
+			stream = self.raw
+		self.input = io.TextIOWrapper(stream, encoding = "utf-8")
 		return self.read_line()
 
 	def read_line(self):
@@ -153,7 +385,17 @@ class CSV:
 			return l
 
 	def close(self):
-		self.input.close()
+		if self.input != None:
+			self.input.close()
+			self.raw.close()
+
+	def tell(self):
+		"""Get the current reading position in bytes (in the file as
+		stored)."""
+		try:
+			return self.raw.tell()
+		except (AttributeError, ValueError):
+			return 0
 
 	def read_defs(self):
 		if self.defs == None:
@@ -203,15 +445,13 @@ NULL_COLORIZER = SyntaxColorizer()
 
 
 class CColorizer:
-	
-	def __init__(self):
-		self.re = re.compile(r"(^#[a-z]+)|" +
-			r"(if|else|for|while|switch|case|break|continue|do|return)|" +
-			r"(typedef|bool|int|char|float|double|short|long|signed|unsigned|struct|union|enum)|" +
-			r"(//.*)|" +
-			r"(/\*\*+/)|" + 
-			r"(/\*(\*[^/]|[^\*])*\*/)|" +
-			r"([a-zA-Z_0-9]+)")
+	re = LazyRE(r"(^#[a-z]+)|" +
+		r"(if|else|for|while|switch|case|break|continue|do|return)|" +
+		r"(typedef|bool|int|char|float|double|short|long|signed|unsigned|struct|union|enum)|" +
+		r"(//.*)|" +
+		r"(/\*\*+/)|" + 
+		r"(/\*(\*[^/]|[^\*])*\*/)|" +
+		r"([a-zA-Z_0-9]+)")
 
 	def colorize(self, line, out):
 		out.write("<font face='monospace'>")
@@ -251,7 +491,11 @@ class Source:
 		self.colorizer = None
 
 	def init_lines(self):
-		self.lines = list(open(self.path, "r"))
+		FLIGHTS.do((self, "lines"), self.read_lines)
+
+	def read_lines(self):
+		if self.lines == None:
+			self.lines = list(open(self.path, "r"))
 
 	def get_lines(self):
 		if self.lines == None:
@@ -324,7 +568,7 @@ class Source:
 					style = style + " padding-left: %spt;" % indent
 
 				# display the line
-				out.write('<tr><td>%d</td><td class=\"source\"' % num)
+				out.write('<tr onclick="javascript:show_line_blocks(%d);"><td>%d</td><td class=\"source\"' % (num, num))
 				if style:
 					out.write(" style=\"%s\"" % style)
 				out.write(">")
@@ -429,16 +673,24 @@ class SourceManager:
 		try:
 			return self.map[name]
 		except KeyError:
-			source = None
-			path = self.find_actual_path(name)
-			if path != None:
-				try:
-					source = Source(name, path)
-					self.sources.append(source)
-				except OSError:
-					pass
-			self.map[name] = source
-			return source
+			return FLIGHTS.do((self, "find", name), partial(self.lookup, name))
+
+	def lookup(self, name):
+		"""Look up the source file using the lookup paths."""
+		try:
+			return self.map[name]
+		except KeyError:
+			pass
+		source = None
+		path = self.find_actual_path(name)
+		if path != None:
+			try:
+				source = Source(name, path)
+				self.sources.append(source)
+			except OSError:
+				pass
+		self.map[name] = source
+		return source
 
 	def collect(self, path, num, stat, val):
 		source = self.find(path)
@@ -486,9 +738,15 @@ VIEW_COLORS = [
 	"darkorange"
 ]
 VIEW_COLOR = 0
+INDEX_CACHE_DIR = os.path.join(
+	os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+	"obviews")
 
 class View:
-	"""Represents view of the program."""
+	"""Represents view of the program. Unless ensure_data() is called,
+	the lines of a view are loaded CFG by CFG, at first use, from an
+	index of the byte ranges of each CFG in the file. The index is
+	cached in INDEX_CACHE_DIR."""
 
 	def __init__(self, path, task):
 		global VIEW_COLOR
@@ -498,11 +756,10 @@ class View:
 		self.label = self.name
 		self.description = ""
 		self.data = None
-		self.csv = CSV(path)
-		self.csv.read_defs()
-		self.label = self.csv.consume("Label", self.label)
-		self.description = self.csv.consume("Description", "")
-		self.defs = self.csv.all_defs()
+		self.index = None
+		self.cfg_data = {}
+		self.load_time = None
+		self.read_defs()
 		self.id = len(task.views)
 		self.level = self.id
 		task.views.append(self)
@@ -512,32 +769,179 @@ class View:
 	def priority(self):
 		return 0
 
-	def load_line(self, l):
+	def read_defs(self):
+		self.csv = CSV(self.path)
+		self.csv.read_defs()
+		self.label = self.csv.consume("Label", self.name)
+		self.description = self.csv.consume("Description", "")
+		self.defs = self.csv.all_defs()
+
+	def reload(self):
+		"""Reload the view after its file has been changed."""
+		self.csv.close()
+		self.data = None
+		self.index = None
+		self.cfg_data = {}
+		self.read_defs()
+
+	def load_line(self, data, l):
 		assert len(l) > 3
-		self.data[int(l[0])][int(l[1])].append((int(l[2], 16), l[3]))
+		data[int(l[0])][int(l[1])].append((int(l[2], 16), l[3]))
 
 	def load_data(self):
 
 		# prepare the data structre
-		self.data = []
+		data = []
 		for g in self.task.cfgs:
-			self.data.append([[] for i in range(0, len(g.verts))])
+			data.append([[] for i in range(0, len(g.verts))])
 
 		# load the view
 		for l in self.csv.read_all():
-			self.load_line(l)
+			self.load_line(data, l)
+		self.data = data
 
 	def ensure_data(self):
 		if self.data == None:
+			FLIGHTS.do((self, "data"), self.read_data)
+
+	def read_data(self):
+		if self.data == None:
+			t = time.perf_counter()
 			self.load_data()
+			self.load_time = time.perf_counter() - t
 
 	def get(self, g, v):
 		"""Get the code corresponding to CFG g and vertex v.
 		The result is an ordered list of pairs (instruction address,
 		corresponding code)."""
-		if self.data == None:
-			self.load_data()
-		return self.data[g.id][v.id]
+		if self.data != None:
+			return self.data[g.id][v.id]
+		data = self.cfg_data.get(g.id)
+		if data == None:
+			data = self.load_cfg(g)
+		return data[v.id]
+
+	def load_cfg(self, g):
+		"""Load the lines of CFG g using the index."""
+		return FLIGHTS.do((self, "cfg", g.id), partial(self.read_cfg, g))
+
+	def read_cfg(self, g):
+		try:
+			return self.cfg_data[g.id]
+		except KeyError:
+			pass
+		if self.index == None:
+			FLIGHTS.do((self, "index"), self.read_index)
+		data = [[] for i in range(0, len(g.verts))]
+		map = {g.id: data}
+		if self.csv.is_compressed():
+			import zlib
+			for chunk in self.index.get(g.id, []):
+				for l in zlib.decompress(chunk).decode("utf-8").split("\n"):
+					self.load_line(map, l.split("\t"))
+		else:
+			with open(self.path, "rb") as input:
+				for (start, end) in self.index.get(g.id, []):
+					input.seek(start)
+					for l in input.read(end - start).decode("utf-8").splitlines():
+						if l and l[0] != "#":
+							self.load_line(map, l.split("\t"))
+		self.cfg_data[g.id] = data
+		return data
+
+	def read_index(self):
+		if self.index == None:
+			t = time.perf_counter()
+			self.load_index()
+			self.load_time = time.perf_counter() - t
+
+	def index_path(self):
+		"""Get the path of the index cache file."""
+		import hashlib
+		return os.path.join(INDEX_CACHE_DIR,
+			hashlib.sha1(os.path.abspath(self.path).encode("utf-8")).hexdigest() + ".json")
+
+	def load_index(self):
+		"""Load the index from the cache if it is up to date, build it
+		and save it else. Compressed views are indexed by build_chunks()
+		instead."""
+		if self.csv.is_compressed():
+			self.index = self.build_chunks()
+			return
+		st = os.stat(self.path)
+		stamp = [st.st_size, st.st_mtime_ns]
+		path = self.index_path()
+		try:
+			with open(path) as input:
+				cache = json.load(input)
+			if cache["stamp"] == stamp:
+				self.index = {int(k): v for (k, v) in cache["index"].items()}
+				return
+		except (OSError, ValueError, KeyError):
+			pass
+		self.index = self.build_index()
+		try:
+			os.makedirs(INDEX_CACHE_DIR, exist_ok = True)
+			with open(path + ".tmp", "w") as out:
+				json.dump({"path": self.path, "stamp": stamp, "index": self.index}, out)
+			os.replace(path + ".tmp", path)
+		except OSError as e:
+			warn("cannot cache index of %s: %s" % (self.path, e))
+
+	def build_index(self):
+		"""Build the map of CFG identifiers to the byte ranges of their
+		lines in the view file."""
+		index = {}
+		cur = None
+		start = 0
+		pos = 0
+		with open(self.path, "rb") as input:
+			for l in input:
+				if l[:1] != b"#" and l.strip():
+					g = int(l[:l.index(b"\t")])
+					if g != cur:
+						if cur != None:
+							index.setdefault(cur, []).append((start, pos))
+						cur = g
+						start = pos
+				pos = pos + len(l)
+		if cur != None:
+			index.setdefault(cur, []).append((start, pos))
+		return index
+
+	def build_chunks(self):
+		"""Build the index of a compressed view: as byte offsets in the
+		compressed file cannot be used, the file is decompressed once
+		and the lines of each CFG are kept compressed with zlib, in
+		chunks, in the map of the CFG identifiers to their chunks."""
+		import zlib
+		index = {}
+		cur = None
+		lines = []
+		csv = CSV(self.path)
+		l = csv.open()
+		while True:
+			if l != None and (not l or l[0] == "#"):
+				l = csv.read_line()
+				continue
+			g = int(l[:l.index("\t")]) if l != None else None
+			if g != cur:
+				if cur != None:
+					index.setdefault(cur, []).append(zlib.compress("\n".join(lines).encode("utf-8"), 1))
+				cur = g
+				lines = []
+			if l == None:
+				break
+			lines.append(l)
+			l = csv.read_line()
+		csv.close()
+		return index
+
+	def count_items(self):
+		"""Count the loaded lines."""
+		if self.data != None:
+			return sum(len(b) for g in self.data for b in g)
+		return sum(len(b) for g in list(self.cfg_data.values()) for b in g)
 
 	def prepare(self, out):
 		"""Called just befoe generting the body of a BB."""
@@ -578,16 +982,21 @@ class SourceView(View):
 	def priority(self):
 		return 2
 
-	def load_line(self, l):
+	def load_line(self, data, l):
 		tmp = l[3].split(":") #windows X:file:line
 		file = tmp[len(tmp)-2]
 		line = tmp[len(tmp)-1]
-		self.data[int(l[0])][int(l[1])].append((int(l[2], 16), (file, int(line))))
+		data[int(l[0])][int(l[1])].append((int(l[2], 16), (file, int(line))))
 		self.task.sman.find(file)
 
 	def get_sources(self):
 		return self.sources
 
+	def reload(self):
+		View.reload(self)
+		self.ensure_data()
+		self.task.resolve_contexts()
+
 	def prepare(self, out):
 		self.file = None
 		self.line = None
@@ -642,8 +1051,35 @@ COLORS = [
 ]
 COLOR_TH = 4
 
-# A dict containing the address of all BB and the function (name, id) that contains them
-BB_DICT = {}  
+# colors of the differences with the baseline (decrease, increase)
+DIFF_COLORS = [
+	[
+		RGB(222, 235, 247),
+		RGB(198, 219, 239),
+		RGB(158, 202, 225),
+		RGB(107, 174, 214),
+		RGB(66, 146, 198)
+	],
+	[
+		RGB(254, 224, 210),
+		RGB(252, 187, 161),
+		RGB(252, 146, 114),
+		RGB(251, 106, 74),
+		RGB(239, 59, 44)
+	]
+]
+
+# colors of the runs for categorical statistics (run of max)
+RUN_COLORS = [
+	RGB(141, 211, 199),
+	RGB(255, 255, 179),
+	RGB(190, 186, 218),
+	RGB(251, 128, 114),
+	RGB(128, 177, 211),
+	RGB(253, 180, 98),
+	RGB(179, 222, 105),
+	RGB(252, 205, 229)
+]
 
 def background(ratio):
 	return COLORS[round(ratio * (len(COLORS) - 1))]
@@ -681,34 +1117,84 @@ class StatDecorator(Decorator):
 	def __init__(self, task):
 		Decorator.__init__(self, task)
 		self.task = task
+
+	def get_val(self, bb, stat):
+		return bb.get_val(stat)
 	
 	def bb_body(self, bb, out):
 		for stat in self.task.stats:
-			val = bb.get_val(stat)
+			val = self.get_val(bb, stat)
+			if stat.categorical:
+				if val != 0:
+					out.write("%s=run %d<br align='left'/>" % (demangle(stat.label), val))
+				continue
+			if stat.delta:
+				out.write("%s=%+d<br align='left'/>" % (demangle(stat.label), val))
+				continue
 			percent = (val * 100. / self.task.sum.get_val(stat)) if self.task.sum.get_val(stat) else 0
-			out.write("%s=%d (%3.2f%%)<br align='left'/>" % (cxxfilt.demangle(stat.label), val, percent))
+			out.write("%s=%d (%3.2f%%)<br align='left'/>" % (demangle(stat.label), val, percent))
+
+
+class MergedStatDecorator(StatDecorator):
+	"""Statistics decorator displaying the values of a function
+	merged over its contexts."""
+
+	def __init__(self, task, fun):
+		StatDecorator.__init__(self, task)
+		self.fun = fun
+
+	def get_val(self, bb, stat):
+		return self.fun.column(stat)[bb.id]
 
 
 class ViewDecorator(Decorator):
+	"""Decorator displaying the lines of the given views in the blocks,
+	taken from the merged listing of the task."""
 
 	def __init__(self, views):
 		self.views = views
 
 	def start_cfg(self, cfg):
 		self.cfg = cfg
+		if self.views != []:
+			self.listing = self.views[0].task.get_listing(cfg, self.views)
+		else:
+			self.listing = None
+
+	def bb_body(self, v, out):
+		if self.listing != None:
+			out.write("".join([t for (l, t) in self.listing[v.id]]))
+
+
+class LayeredViewDecorator(ViewDecorator):
+	"""View decorator tagging the lines of each view so that the views
+	can be shown or hidden in the browser: consecutive lines of a view
+	are grouped in a cell identified by layer<view>_<block>_<number>
+	where view is the index of the view (its level)."""
+
+	def __init__(self, views):
+		ViewDecorator.__init__(self, views)
+		self.names = {view.level: escape_html(view.name) for view in views}
 
 	def bb_body(self, v, out):
-		g = self.cfg
-		l = []
-		for view in self.views:
-			view.prepare(out)
-		for view in self.views:
-			c = view.get(g, v)
-			for i in range(0, len(c)):
-				l.append((c[i][0], view.level, i, view, c[i][1]))
-		for (a, v, i, v, c) in sorted(l):
-			v.gen(a, c, out)
-			#out.write("<br align='left'/>")
+		if self.listing == None:
+			return
+		l = self.listing[v.id]
+		if l == []:
+			return
+		out.write("<table border='0' cellpadding='0' cellspacing='0'>")
+		cur = None
+		n = 0
+		for (level, t) in l:
+			if level != cur:
+				if cur != None:
+					out.write("</td></tr>")
+				out.write("<tr><td align='left' balign='left' id='layer%d_%d_%d' tooltip='%s'>" \
+					% (level, v.id, n, self.names[level]))
+				cur = level
+				n = n + 1
+			out.write(t)
+		out.write("</td></tr></table>")
 
 
 class SeqDecorator(Decorator):
@@ -780,6 +1266,9 @@ class Data:
 			self.data[id] = val
 		return self.data[id]
 
+	def remove_val(self, id):
+		self.data.pop(id, None)
+
 
 BLOCK_LABEL_MAP = {
 	BLOCK_ENTRY:	"entry",
@@ -846,7 +1335,7 @@ class CallBlock(Block):
 	def gen(self, dec, out):
 		if self.callee != None:
 			out.write("URL=\"javascript:call_function(%d, '%s')\",label=\"call %s\",shape=\"box\"" \
-				% (self.callee.id, self.callee.label, cxxfilt.demangle(self.callee.label)))
+				% (self.callee.id, self.callee.label, demangle(self.callee.label)))
 		else:
 			out.write("label=\"call unknown\",shape=\"box\"")
 	
@@ -871,6 +1360,33 @@ class Edge(Data):
 			return self.type
 
 
+def make_block_index(bbs):
+	"""Build an index of the given basic blocks sorted by address, to be
+	looked up with find_in_block_index(). Along with the bases, the
+	running maximum of the block ends is kept so that a block starting
+	before other ones and covering them is found too."""
+	bbs = sorted(bbs, key = lambda v: v.base)
+	ends = []
+	end = 0
+	for v in bbs:
+		end = max(end, v.base + v.size)
+		ends.append(end)
+	return ([v.base for v in bbs], ends, bbs)
+
+def find_in_block_index(index, addr):
+	"""Find the blocks of the index containing the address, ordered by
+	base address. Blocks of different CFGs may share the address."""
+	bases, ends, bbs = index
+	res = []
+	j = bisect.bisect_right(bases, addr) - 1
+	while j >= 0 and addr < ends[j]:
+		if addr < bbs[j].base + bbs[j].size:
+			res.append(bbs[j])
+		j = j - 1
+	res.reverse()
+	return res
+
+
 class CFG:
 	
 	def __init__(self, id, label, addr, ctx):
@@ -884,6 +1400,14 @@ class CFG:
 		self.unknown = None
 		self.max = Data()
 		self.sum = Data()
+		self.incl = Data()
+		self.context = None
+		self.bb_index = None
+		self.regions = None
+		self.listing = {}
+		self.parent = None
+		self.children = []
+		self.function = None
 	
 	def add(self, block):
 		self.verts.append(block)
@@ -891,20 +1415,15 @@ class CFG:
 
 	def find_bb(self, addr):
 		"""Find the BB containing the address."""
-		for v in self.verts:
-			if v.type == BLOCK_CODE:
-				if v.base <= addr and addr < v.base + v.size:
-					return v
-		return None
+		if self.bb_index == None:
+			self.bb_index = make_block_index(v for v in self.verts if v.type == BLOCK_CODE)
+		r = find_in_block_index(self.bb_index, addr)
+		return r[0] if r != [] else None
 
 	def begin_stat(self, id):
 		self.max.set_val(id, 0)
 		self.sum.set_val(id, 0)
-
-	def collect(self, id, val, addr, size, ctx, task):
-		if ctx == self.ctx:
-			for b in self.verts:
-				b.collect(id, val, addr, size, task)
+		self.incl.set_val(id, 0)
 
 	def end_stat(self, id):
 		for v in self.verts:
@@ -915,12 +1434,9 @@ class CFG:
 	def gen(self, dec, out):
 		"""Generate the DOT code for the CFG with the given decorator."""
 		dec.start_cfg(self)
-		out.write("digraph %s {\n" % self.id)
-		out.write('node [ fontname = "Archivo" , margin="0.2,0.055", shape="box",style="rounded, filled", penwidth="1" , color="#3B90F3" , fillcolor="#FFFFFF" ]\n')
-		out.write('graph [bgcolor="#C2DFF9"]\n')
-		out.write('edge [ color="#3B90F3", style="solid", penwidth="1" , fontcolor="#1C69B6", fontname="Archivo"]\n')
+		self.gen_head(out)
 		for b in self.verts:
-			out.write("\t%s [" % b.id)
+			out.write('\t%s [id="node%d", ' % (b.id, b.id + 1))
 			b.gen(dec, out)
 			out.write("];\n")
 		for b in self.verts:
@@ -933,13 +1449,427 @@ class CFG:
 		dec.cfg_label(self, out)
 		out.write("\n}\n")
 		dec.end_cfg(self)
+
+	def gen_head(self, out):
+		"""Generate the DOT header of the CFG."""
+		out.write("digraph %s {\n" % self.id)
+		out.write('node [ fontname = "Archivo" , margin="0.2,0.055", shape="box",style="rounded, filled", penwidth="1" , color="#3B90F3" , fillcolor="#FFFFFF" ]\n')
+		out.write('graph [bgcolor="#C2DFF9"]\n')
+		out.write('edge [ color="#3B90F3", style="solid", penwidth="1" , fontcolor="#1C69B6", fontname="Archivo"]\n')
+
+	def get_regions(self):
+		"""Get the collapsible regions of the CFG (computed at first call)."""
+		if self.regions == None:
+			self.regions = find_regions(self)
+		return self.regions
+
+
+######## Level of detail ########
+
+LOD_THRESHOLD = 300
+LOD_HOPS = 2
+
+def strong_components(verts):
+	"""Compute the strongly connected components of the given blocks
+	(iterative Tarjan algorithm)."""
+	index = {}
+	low = {}
+	stack = []
+	on_stack = set()
+	comps = []
+	for root in verts:
+		if root.id in index:
+			continue
+		work = [(root, 0)]
+		while work:
+			(v, i) = work.pop()
+			if i == 0:
+				index[v.id] = low[v.id] = len(index)
+				stack.append(v)
+				on_stack.add(v.id)
+			recurse = False
+			while i < len(v.next):
+				w = v.next[i].snk
+				i = i + 1
+				if w.id not in index:
+					work.append((v, i))
+					work.append((w, 0))
+					recurse = True
+					break
+				elif w.id in on_stack:
+					low[v.id] = min(low[v.id], index[w.id])
+			if recurse:
+				continue
+			if low[v.id] == index[v.id]:
+				comp = []
+				while True:
+					w = stack.pop()
+					on_stack.discard(w.id)
+					comp.append(w)
+					if w is v:
+						break
+				comps.append(comp)
+			if work:
+				u = work[-1][0]
+				low[u.id] = min(low[u.id], low[v.id])
+	return comps
+
+
+class Region:
+	"""Set of blocks of a CFG collapsed into a summary node: a loop or
+	a straight-line chain. It is identified by its smallest block
+	identifier."""
+
+	def __init__(self, kind, blocks):
+		self.kind = kind
+		self.blocks = sorted(blocks, key = lambda b: b.id)
+		self.id = self.blocks[0].id
+
+	def gen(self, sdec, out):
+		"""Generate the DOT attributes of the summary node."""
+		codes = [b for b in self.blocks if b.type == BLOCK_CODE]
+		out.write('id="region%d", URL="javascript:lod_expand(%d)", style="rounded, filled, dashed", ' \
+			% (self.id, self.id))
+		out.write("label=<<table border='0' cellpadding='8px'><tr><td><b><font color='#1C69B6' point-size='16px'>%s of %d blocks</font></b></td></tr>" \
+			% (self.kind, len(self.blocks)))
+		if codes != []:
+			out.write("<tr><td>%x-%x</td></tr>" \
+				% (min(b.base for b in codes), max(b.base + b.size for b in codes)))
+		task = sdec.task
+		if task.stats != []:
+			out.write("<hr/><tr><td align='left'>")
+			for stat in task.stats:
+				if stat.categorical:
+					continue
+				val = sum(sdec.get_val(b, stat) for b in self.blocks)
+				total = task.sum.get_val(stat)
+				out.write("%s=%d (%3.2f%%)<br align='left'/>" \
+					% (demangle(stat.label), val, (val * 100. / total) if total else 0))
+			out.write("</td></tr>")
+		out.write("</table>>")
+
+
+def find_regions(g):
+	"""Compute the collapsible regions of a CFG: its loops (non-trivial
+	strongly connected components) and the maximal straight-line chains
+	of the other blocks. Only code and call blocks are collapsed."""
+	collapsible = lambda b: b.type in (BLOCK_CODE, BLOCK_CALL)
+	regions = []
+	looped = set()
+	for comp in strong_components(g.verts):
+		if len(comp) == 1 and all(e.snk is not comp[0] for e in comp[0].next):
+			continue
+		if all(collapsible(b) for b in comp):
+			regions.append(Region("loop", comp))
+			looped.update(b.id for b in comp)
+
+	# chains made of blocks with single successor / single predecessor
+	preds = [[] for v in g.verts]
+	for v in g.verts:
+		for e in v.next:
+			preds[e.snk.id].append(v)
+	free = lambda b: collapsible(b) and b.id not in looped
+	linked = lambda b: free(b) and len(b.next) == 1 \
+		and free(b.next[0].snk) and len(preds[b.next[0].snk.id]) == 1
+	for v in g.verts:
+		if not free(v) or (len(preds[v.id]) == 1 and linked(preds[v.id][0])):
+			continue
+		chain = [v]
+		while linked(chain[-1]):
+			chain.append(chain[-1].next[0].snk)
+		if len(chain) >= 2:
+			regions.append(Region("chain", chain))
+	return regions
+
+
+class LOD:
+	"""Level of detail of a CFG rendering: either the coarse graph with
+	some regions expanded or the neighbourhood of a block at a given
+	number of hops."""
+
+	def __init__(self, g, sdec, mode, expand = [], focus = None, hops = LOD_HOPS):
+		self.g = g
+		self.sdec = sdec
+		self.mode = mode
+		self.expand = sorted(expand)
+		self.focus = focus
+		self.hops = hops
+
+	def key(self):
+		return (self.mode, tuple(self.expand), self.focus, self.hops)
+
+	def node_map(self):
+		"""Build the map of block identifiers to the displayed nodes
+		(block, region or stub) and the list of nodes."""
+		g = self.g
+		map = {}
+		if self.mode == "coarse":
+			for r in g.get_regions():
+				if r.id not in self.expand:
+					for b in r.blocks:
+						map[b.id] = ("region", r)
+			for v in g.verts:
+				if v.id not in map:
+					map[v.id] = ("block", v)
+		else:
+			succs = [[] for v in g.verts]
+			for v in g.verts:
+				for e in v.next:
+					succs[v.id].append(e.snk)
+					succs[e.snk.id].append(v)
+			front = [g.verts[self.focus]]
+			map[self.focus] = ("block", front[0])
+			for i in range(0, self.hops + 1):
+				next = []
+				for v in front:
+					for w in succs[v.id]:
+						if w.id not in map:
+							map[w.id] = ("block", w) if i < self.hops else ("stub", w)
+							next.append(w)
+				front = next
+		return map
+
+	def gen(self, dec, out):
+		"""Generate the DOT code of the rendering."""
+		g = self.g
+		map = self.node_map()
+		dec.start_cfg(g)
+		g.gen_head(out)
+		names = {}
+		for (kind, n) in map.values():
+			if (kind, n.id) in names:
+				continue
+			if kind == "block":
+				name = str(n.id)
+				out.write('\t%s [id="node%d", ' % (name, n.id + 1))
+				n.gen(dec, out)
+			elif kind == "region":
+				name = "r%d" % n.id
+				out.write("\t%s [" % name)
+				n.gen(self.sdec, out)
+			else:
+				name = "s%d" % n.id
+				out.write('\t%s [id="stub%d", URL="javascript:lod_focus(%d)", style="rounded, dashed", label="BB %d"' \
+					% (name, n.id, n.id, n.id))
+			out.write("];\n")
+			names[(kind, n.id)] = name
+		done = set()
+		for v in g.verts:
+			for e in v.next:
+				try:
+					(sk, sn) = map[e.src.id]
+					(tk, tn) = map[e.snk.id]
+				except KeyError:
+					continue
+				if sk == "stub" and tk == "stub":
+					continue
+				src = names[(sk, sn.id)]
+				snk = names[(tk, tn.id)]
+				if sk == "block" and tk == "block":
+					out.write("\t%s -> %s" % (src, snk))
+					l = e.get_type_label()
+					if l != None:
+						out.write(" [label=\"%s\"]" % l)
+					out.write(";\n")
+				elif src != snk and (src, snk) not in done:
+					done.add((src, snk))
+					out.write("\t%s -> %s;\n" % (src, snk))
+		dec.cfg_label(g, out)
+		out.write("\n}\n")
+		dec.end_cfg(g)
+		self.count = len(names)
+
+	def gen_info(self, out):
+		"""Generate the HTML notice of the level of detail."""
+		if self.mode == "coarse":
+			out.write("Coarse graph: %d nodes for %d blocks. " % (self.count, len(self.g.verts)))
+		else:
+			out.write("Neighbourhood of BB %d at %d hops: %d nodes for %d blocks. " \
+				% (self.focus, self.hops, self.count, len(self.g.verts)))
+			out.write('<a href="javascript:lod_hops(1);">more hops</a> ')
+			out.write('<a href="javascript:lod_set(\'coarse\');">coarse graph</a> ')
+		out.write('<a href="javascript:lod_set(\'full\');">full graph</a>')
+
+
+def get_lod(g, sdec, query):
+	"""Get the level of detail of a CFG rendering from the query:
+	lod=full, lod=coarse (with expand=ID,...) or lod=focus (with
+	focus=BB and hops=N). Without lod, large CFGs are displayed coarse.
+	Return None for a full rendering."""
+	mode = query.get("lod")
+	if mode == None:
+		if LOD_THRESHOLD == 0 or len(g.verts) <= LOD_THRESHOLD:
+			return None
+		mode = "coarse"
+	if mode == "coarse":
+		expand = [int(x) for x in query.get("expand", "").split(",") if x]
+		return LOD(g, sdec, mode, expand = expand)
+	elif mode == "focus":
+		focus = int(query["focus"])
+		if focus < 0 or focus >= len(g.verts):
+			return None
+		return LOD(g, sdec, mode, focus = focus, hops = int(query.get("hops", LOD_HOPS)))
+	else:
+		return None
 		
 
+######## Call contexts ########
+
+CTX_ROOT = 0
+CTX_FUN = 1
+CTX_CALL = 2
+CTX_OTHER = 3
+
+class Context:
+	"""Node of the call context tree. Each node represents an item
+	(function or call site) of the context paths found in the CFG file
+	and context paths sharing the same prefix share the same nodes."""
+
+	def __init__(self, task, parent = None, text = None):
+		self.task = task
+		self.parent = parent
+		self.text = text
+		self.children = {}
+		self.depth = 0 if parent == None else parent.depth + 1
+		self.cfg = None
+		self.block = None
+		self.source = None
+		if parent == None:
+			self.kind = CTX_ROOT
+			self.cfg = task.cfgs[0] if task.cfgs else None
+		elif text.startswith("FUN("):
+			self.kind = CTX_FUN
+			self.cfg = task.find_cfg(int(text[4:-1], 16))
+		elif text.startswith("CALL("):
+			self.kind = CTX_CALL
+			self.cfg = parent.cfg
+			if self.cfg != None:
+				self.block = self.cfg.find_bb(int(text[5:-1], 16))
+		else:
+			self.kind = CTX_OTHER
+			self.cfg = parent.cfg
+
+	def get(self, text):
+		"""Get the child context for the given item text."""
+		try:
+			return self.children[text]
+		except KeyError:
+			c = Context(self.task, self, text)
+			self.children[text] = c
+			self.task.contexts.append(c)
+			return c
+
+	def path(self):
+		"""Get the list of items from the root to this context."""
+		l = [None] * self.depth
+		c = self
+		while c.parent != None:
+			l[c.depth - 1] = c
+			c = c.parent
+		return l
+
+	def resolve(self, sview):
+		"""Resolve the source location of a call site."""
+		if self.kind == CTX_CALL and self.block != None:
+			l = sview.get(self.cfg, self.block)
+			if l != []:
+				self.source = l[-1][1]
+
+	def gen(self, out):
+		"""Generate the HTML of the breadcrumb item."""
+		if self.kind == CTX_FUN and self.cfg != None:
+			out.write("""<a href="javascript: open_function(%d, '%s');">%s</a>""" \
+				% (self.cfg.id, demangle(self.cfg.label), demangle(self.cfg.label)))
+		elif self.kind == CTX_CALL and self.source != None:
+			out.write("""<a href="javascript: show_source('%s');">%s:%d</a>""" \
+				% (self.source[0], self.source[0], self.source[1]))
+		else:
+			out.write(self.text)
+
+
+class Function:
+	"""Function merging the CFGs of its different call contexts.
+	The first CFG is used as representative and the blocks of the other
+	CFGs are mapped to it according to their type and address."""
+
+	def __init__(self, label):
+		self.label = label
+		self.cfgs = []
+		self.maps = None
+		self.columns = {}
+
+	def add(self, cfg):
+		self.cfgs.append(cfg)
+		cfg.function = self
+
+	def get_cfg(self):
+		"""Get the representative CFG."""
+		return self.cfgs[0]
+
+	def block_keys(self, cfg):
+		"""Compute structural keys identifying the blocks of a CFG."""
+		keys = []
+		counts = {}
+		for v in cfg.verts:
+			if v.type == BLOCK_CODE:
+				k = (BLOCK_CODE, v.base)
+			else:
+				if v.type == BLOCK_CALL:
+					k = (BLOCK_CALL, v.callee.label if v.callee != None else None)
+				else:
+					k = (v.type, None)
+				n = counts.get(k, 0)
+				counts[k] = n + 1
+				k = k + (n,)
+			keys.append(k)
+		return keys
+
+	def make_maps(self):
+		"""Map the blocks of each CFG to the blocks of the representative.
+		None is used when the mapping is the identity, -1 for unmatched
+		blocks."""
+		self.maps = [None]
+		rkeys = self.block_keys(self.cfgs[0])
+		rmap = {k: i for (i, k) in enumerate(rkeys)}
+		for g in self.cfgs[1:]:
+			keys = self.block_keys(g)
+			if keys == rkeys:
+				self.maps.append(None)
+			else:
+				self.maps.append([rmap.get(k, -1) for k in keys])
+
+	def column(self, stat):
+		"""Get the values of the statistics for each block of the
+		representative CFG, reduced over the contexts with the context
+		operator of the statistics."""
+		try:
+			return self.columns[stat]
+		except KeyError:
+			pass
+		if self.maps == None:
+			self.make_maps()
+		op = OP_FUN[stat.context_op]
+		n = len(self.cfgs[0].verts)
+		res = None
+		for (g, m) in zip(self.cfgs, self.maps):
+			col = [v.get_val(stat) for v in g.verts]
+			if m != None:
+				rcol = [0] * n
+				for (i, x) in zip(m, col):
+					if i >= 0:
+						rcol[i] = op(rcol[i], x)
+				col = rcol
+			res = col if res == None else list(map(op, res, col))
+		self.columns[stat] = res
+		return res
+
+
 class Task:
 	"""Represents a task of the application."""
 	
-	def __init__(self, exec, name, path, source_path = None):
+	def __init__(self, exec, name, path, source_path = None, progress = None):
 		self.exec = exec
+		self.progress = progress
 		self.name = name
 		self.path = path
 		self.entry = None
@@ -947,8 +1877,18 @@ class Task:
 		self.max = Data()
 		self.sum = Data()
 		self.stats = []
+		self.cfg_map = {}
+		self.contexts = []
+		self.call_order = []
+		self.functions = {}
+		self.timings = []
+		self.ctx_map = None
+		self.addr_index = None
+		self.line_index = None
 		self.sman = SourceManager([os.path.dirname(exec)], source_path.split(',') if source_path else ['.'])
+		t = time.perf_counter()
 		self.read()
+		self.read_time = time.perf_counter() - t
 		self.defs = None
 		self.views = []
 		self.sview = None
@@ -973,10 +1913,46 @@ class Task:
 
 	def find_cfg(self, addr):
 		"""Find a CFG by its address."""
+		return self.cfg_map.get(addr)
+
+	def make_contexts(self):
+		"""Build the call context tree from the context strings of the CFGs."""
+		root = Context(self)
 		for g in self.cfgs:
-			if g.addr == addr:
-				return g
-		return None
+			c = root
+			for s in g.ctx[1:-1].split(','):
+				s = s.strip()
+				if s == "":
+					break
+				c = c.get(s)
+			g.context = c
+
+	def make_call_tree(self):
+		"""Build the call tree spanning the CFGs from the callees of the
+		call blocks. A CFG is attached to the first caller found from
+		the entry and call_order records the CFGs in pre-order."""
+		seen = [False] * len(self.cfgs)
+		for r in self.cfgs:
+			if seen[r.id]:
+				continue
+			seen[r.id] = True
+			todo = [r]
+			while todo:
+				g = todo.pop()
+				self.call_order.append(g)
+				for v in g.verts:
+					if v.type == BLOCK_CALL and v.callee != None \
+					and not seen[v.callee.id]:
+						seen[v.callee.id] = True
+						v.callee.parent = g
+						g.children.append(v.callee)
+						todo.append(v.callee)
+
+	def resolve_contexts(self):
+		"""Resolve the source lines of the call sites of the contexts."""
+		if self.sview != None:
+			for c in self.contexts:
+				c.resolve(self.sview)
 	
 	def add(self, cfg):
 		"""Add a a CFG to the task."""
@@ -990,20 +1966,164 @@ class Task:
 		for g in self.cfgs:
 			g.begin_stat(id)
 
+	def find_blocks(self, addr, ctx):
+		"""Find the blocks containing the address in the CFGs of the
+		given context."""
+		if self.ctx_map == None:
+			bbs = {}
+			for g in self.cfgs:
+				bbs.setdefault(g.ctx, []).extend(v for v in g.verts if v.type == BLOCK_CODE)
+			self.ctx_map = {c: make_block_index(l) for (c, l) in bbs.items()}
+		try:
+			return find_in_block_index(self.ctx_map[ctx], addr)
+		except KeyError:
+			return []
+
+	def locate(self, addr):
+		"""Find the blocks containing the address in all CFGs."""
+		if self.addr_index == None:
+			self.addr_index = make_block_index(v
+				for g in self.cfgs for v in g.verts if v.type == BLOCK_CODE)
+		return find_in_block_index(self.addr_index, addr)
+
 	def collect(self, id, val, addr, size, ctx):
 		"""Collect statistic item in the CFG."""
-		for g in self.cfgs:
-			g.collect(id, val, addr, size, ctx, self)
+		for b in self.find_blocks(addr, ctx):
+			b.collect(id, val, addr, size, self)
 
 	def end_stat(self, id):
 		for g in self.cfgs:
 			g.end_stat(id)
+		self.sum_stat(id)
+
+	def sum_stat(self, id):
+		"""Compute the totals of the task and the inclusive values of
+		the CFGs from the values of the CFGs."""
+		for g in self.cfgs:
 			self.max.max_val(id, g.max.get_val(id))
 			self.sum.add_val(id, g.sum.get_val(id))
+		for g in reversed(self.call_order):
+			x = g.sum.get_val(id)
+			for c in g.children:
+				x = x + c.incl.get_val(id)
+			g.incl.set_val(id, x)
+
+	def reset_stat(self, id):
+		"""Remove the values of a statistics."""
+		for d in (self.max, self.sum, self.sman.max):
+			d.remove_val(id)
+		for g in self.cfgs:
+			for d in [g.max, g.sum, g.incl] + g.verts:
+				d.remove_val(id)
+		for f in self.functions.values():
+			f.columns.pop(id, None)
+		for src in self.get_sources():
+			for d in src.data:
+				if d != None:
+					d.remove_val(id)
+
+	def sort_views(self):
+		"""Sort the views by priority."""
+		self.views.sort(key = lambda v: v.priority(), reverse=True)
+		for i in range(0, len(self.views)):
+			self.views[i].level = i
+
+	def get_listing(self, g, views):
+		"""Get the listing of the given views for the blocks of CFG g:
+		for each block, the address-ordered list of pairs (view level,
+		HTML code) merging the lines of the views."""
+		lines = [self.get_view_lines(g, view) for view in views]
+		listing = []
+		for i in range(0, len(g.verts)):
+			l = []
+			for j in range(0, len(views)):
+				l.extend((a, views[j].level, t) for (a, t) in lines[j][i])
+			if len(views) > 1:
+				l.sort(key = lambda x: x[:2])
+			listing.append([(level, t) for (_, level, t) in l])
+		return listing
+
+	def get_view_lines(self, g, view):
+		"""Get the lines of the view for the blocks of CFG g, built at
+		first use: for each block, the list of pairs (address, HTML
+		code)."""
+		lines = g.listing.get(view.level)
+		if lines == None:
+			lines = []
+			for v in g.verts:
+				view.prepare(None)
+				l = []
+				for (addr, code) in view.get(g, v):
+					out = StringBuffer()
+					view.gen(addr, code, out)
+					l.append((addr, out.to_str()))
+				lines.append(l)
+			g.listing[view.level] = lines
+		return lines
+
+	def reset_listings(self):
+		"""Invalidate the view listings after a view change."""
+		for g in self.cfgs:
+			g.listing = {}
+		self.line_index = None
+
+	def get_line_blocks(self, name, line):
+		"""Get the pairs (CFG, block) whose instructions come from the
+		given source line. Uses a reverse index of the source view built
+		at first call: for each source, the line number gives an array
+		of CFG and block identifiers."""
+		index = self.line_index
+		if index == None:
+			lists = {}
+			if self.sview != None:
+				for g in self.cfgs:
+					for v in g.verts:
+						if v.type == BLOCK_CODE:
+							for k in dict.fromkeys(fl for (_, fl) in self.sview.get(g, v)):
+								lists.setdefault(k, []).extend((g.id, v.id))
+			index = {}
+			for ((f, l), ids) in lists.items():
+				index.setdefault(f, {})[l] = array.array("L", ids)
+			self.line_index = index
+		ids = index.get(name, {}).get(line, [])
+		return [(self.cfgs[ids[i]], self.cfgs[ids[i]].verts[ids[i + 1]])
+			for i in range(0, len(ids), 2)]
+
+	def find_view(self, path):
+		"""Find the index of a view by its path."""
+		for i in range(0, len(self.views)):
+			if self.views[i].path == path:
+				return i
+		return None
+
+	def gen_flame(self, stat, out):
+		"""Generate the call tree in collapsed stack format
+		(as used by flame graph tools) for the given statistics."""
+		paths = [None] * len(self.cfgs)
+		stacks = {}
+		for g in self.call_order:
+			name = demangle(g.label).replace(";", ",")
+			if g.parent == None:
+				path = name
+			else:
+				path = paths[g.parent.id] + ";" + name
+			paths[g.id] = path
+			x = g.sum.get_val(stat)
+			if x != 0:
+				stacks[path] = stacks.get(path, 0) + x
+		for (k, x) in stacks.items():
+			out.write("%s %d\n" % (k, x))
 
 	def make_cfg(self, l):
 		g = CFG(len(self.cfgs), l[1], int(l[2], 16), l[3])
 		self.cfgs.append(g)
+		self.cfg_map.setdefault(g.addr, g)
+		try:
+			f = self.functions[g.label]
+		except KeyError:
+			f = Function(g.label)
+			self.functions[g.label] = f
+		f.add(g)
 
 	def make_entry(self, l):
 		g = self.cfgs[-1]
@@ -1035,7 +2155,6 @@ class Task:
 			int(l[1], 16),
 			int(l[2]))
 		g.add(b)
-		BB_DICT[int(l[1], 16)] = [g.label, g.id]
 
 	def make_call(self, l):
 		g = self.cfgs[-1]
@@ -1053,7 +2172,7 @@ class Task:
 	def read(self):
 		"""Read the task from the file."""
 		path = os.path.join(self.path, "cfg.csv")
-		if not os.path.exists(path):
+		if not os.path.exists(find_file(path)):
 			fatal("no CFG file found at '" + path + "'. Did you forget -W option in objdump/owcet?")
 		map = {
 			'G': self.make_cfg,
@@ -1069,6 +2188,8 @@ class Task:
 
 			# parse definitions
 			csv = CSV(path)
+			if self.progress != None:
+				self.progress.start_cfg(csv, csv.size())
 			for l in csv.read_all():
 				map[l[0]](l)
 
@@ -1078,6 +2199,8 @@ class Task:
 					if v.type == BLOCK_CALL:
 						if v.callee != None:
 							v.callee = self.cfgs[v.callee]
+			self.make_contexts()
+			self.make_call_tree()
 
 			# record defs
 			self.label = csv.consume("Label", self.name)
@@ -1096,12 +2219,20 @@ OP_MAP = {
 	"sum":	OP_SUM,
 	"max":	OP_MAX
 }
+OP_FUN = {
+	OP_SUM:	lambda x, y: x + y,
+	OP_MAX:	max
+}
+
+HOTSPOT_MAX = 100
 
 class Statistic:
 	"""Record information about statistics."""
 	name = None
 	map = None
 	max = None
+	delta = False
+	categorical = False
 
 	def __init__(self, task, name, path):
 		self.task = task
@@ -1119,6 +2250,8 @@ class Statistic:
 		self.csv = None
 		self.defs = None
 		self.loaded = False
+		self.hotspots = None
+		self.load_time = None
 
 	def get_op(self, id, d):
 		op = self.csv.consume(id, None)
@@ -1128,8 +2261,8 @@ class Statistic:
 			try:
 				return OP_MAP[op]
 			except KeyError:
-				warn("unknown line-op operator (%s) for %s"
-					% (self.defs["LineOperation"], self.name))
+				warn("unknown %s operator (%s) for %s"
+					% (id, op, self.name))
 				return d
 
 	def preload(self):
@@ -1142,10 +2275,14 @@ class Statistic:
 		self.description = self.csv.consume("Description", self.unit)
 		self.line_op = self.get_op("LineOp", OP_SUM)
 		self.concat_op = self.get_op("ConcatOp", OP_SUM)
-		self.context_op = self.get_op("ContextOp", OP_SUM)
+		self.context_op = self.get_op("ContextOp", self.context_op)
 		self.defs = self.csv.all_defs()
 
 	def ensure_preload(self):
+		if self.defs == None:
+			FLIGHTS.do((self, "preload"), self.read_defs)
+
+	def read_defs(self):
 		if self.defs == None:
 			self.preload()
 
@@ -1161,15 +2298,62 @@ class Statistic:
 					int(fs[2]),
 					fs[3])
 			self.task.end_stat(self)
+			self.make_hotspots()
 		except OSError as e:
 			fatal("cannot open statistics %s: %s." % (self.name, e))
 
+	def make_hotspots(self):
+		"""Build the rankings of the blocks, source lines and functions
+		having the biggest values for the statistics."""
+		def blocks():
+			for g in self.task.cfgs:
+				for v in g.verts:
+					if v.type == BLOCK_CODE:
+						x = v.get_val(self)
+						if x != 0:
+							yield (x, g.id, v.id)
+		def lines():
+			for src in self.task.get_sources():
+				for i in range(0, len(src.data)):
+					x = src.get_stat(i, self)
+					if x != 0:
+						yield (x, src.name, i)
+		def functions():
+			for g in self.task.cfgs:
+				x = g.sum.get_val(self)
+				if x != 0:
+					yield (x, g.id)
+		key = (lambda x: abs(x[0])) if self.delta else None
+		self.hotspots = {
+			"block":	heapq.nlargest(HOTSPOT_MAX, blocks(), key),
+			"line":		heapq.nlargest(HOTSPOT_MAX, lines(), key),
+			"function":	heapq.nlargest(HOTSPOT_MAX, functions(), key)
+		}
+
 	def ensure_load(self):
 		"""Ensure that statistics data has been loaded."""
-		self.ensure_preload()
 		if not self.loaded:
+			FLIGHTS.do((self, "load"), self.read_data)
+
+	def read_data(self):
+		if self.loaded:
+			return
+		self.ensure_preload()
+		t = time.perf_counter()
+		try:
 			self.load()
-			self.loaded = True
+		except BaseException:
+			self.task.reset_stat(self)
+			raise
+		self.load_time = time.perf_counter() - t
+		self.loaded = True
+
+	def reload(self):
+		"""Reload the statistics after its file has been changed."""
+		self.task.reset_stat(self)
+		self.defs = None
+		self.loaded = False
+		self.ensure_load()
 
 	def record_source(self, source):
 		"""Record data in the given source."""
@@ -1192,9 +2376,309 @@ class Statistic:
 		return self.task.sum.get_val(self)
 
 
+class DeltaStatistic(Statistic):
+	"""Difference between a statistic of the task and the same
+	statistic of a baseline task. CFGs are matched by label and context,
+	blocks by address and source lines by file and number. As values
+	may be negative, the maximum of the task and of the sources records
+	the biggest absolute difference."""
+	delta = True
+
+	def __init__(self, task, stat, base):
+		Statistic.__init__(self, task, "delta-" + stat.name, stat.path)
+		self.stat = stat
+		self.base = base
+
+	def preload(self):
+		self.stat.ensure_preload()
+		self.base.ensure_preload()
+		self.label = "\u0394 " + self.stat.label
+		self.unit = self.stat.unit
+		self.total = self.stat.total
+		self.description = self.stat.description
+		self.line_op = self.stat.line_op
+		self.concat_op = self.stat.concat_op
+		self.context_op = self.stat.context_op
+		self.defs = dict(self.stat.defs)
+		self.defs["Baseline"] = self.base.task.path
+
+	def base_column(self, g, h):
+		"""Get the baseline values of the blocks of g from the matching
+		CFG h (possibly None)."""
+		if h == None:
+			return [0] * len(g.verts)
+		bbs = {v.base: v for v in h.verts if v.type == BLOCK_CODE}
+		return [bbs[v.base].get_val(self.base)
+			if v.type == BLOCK_CODE and v.base in bbs else 0
+			for v in g.verts]
+
+	def load(self):
+		self.stat.ensure_load()
+		self.base.ensure_load()
+		task = self.task
+		btask = self.base.task
+		cfgs = {(h.label, h.ctx): h for h in btask.cfgs}
+		amax = 0
+
+		# blocks and functions
+		task.begin_stat(self)
+		for g in task.cfgs:
+			h = cfgs.get((g.label, g.ctx))
+			cur = [v.get_val(self.stat) for v in g.verts]
+			old = self.base_column(g, h)
+			for (v, x) in zip(g.verts, [x - y for (x, y) in zip(cur, old)]):
+				if x != 0:
+					v.set_val(self, x)
+					amax = max(amax, abs(x))
+			g.end_stat(self)
+			if h != None:
+				g.sum.set_val(self, g.sum.get_val(self.stat) - h.sum.get_val(self.base))
+			else:
+				g.sum.set_val(self, g.sum.get_val(self.stat))
+		task.sum_stat(self)
+		task.max.set_val(self, amax)
+		task.sum.set_val(self, self.stat.get_sum() - self.base.get_sum())
+
+		# source lines (matched by base name if paths differ)
+		bsrcs = {}
+		for bsrc in btask.get_sources():
+			name = os.path.basename(bsrc.name)
+			bsrcs[name] = None if name in bsrcs else bsrc
+		amax = 0
+		for src in task.get_sources():
+			bsrc = btask.sman.map.get(src.name)
+			if bsrc == None:
+				bsrc = bsrcs.get(os.path.basename(src.name))
+			if bsrc == None:
+				bsrc = Source(src.name, src.path)
+			n = max(len(src.data), len(bsrc.data))
+			cur = [src.get_stat(i, self.stat) for i in range(0, n)]
+			old = [bsrc.get_stat(i, self.base) for i in range(0, n)]
+			for (i, x) in enumerate([x - y for (x, y) in zip(cur, old)]):
+				if x != 0:
+					src.collect(i, self, x)
+					amax = max(amax, abs(x))
+		task.sman.max.set_val(self, amax)
+		self.make_hotspots()
+
+
+AGGREGATES = ["min", "max", "mean", "argmax"]
+AGGREGATE_LABELS = {
+	"min":		"min %s",
+	"max":		"max %s",
+	"mean":		"mean %s",
+	"argmax":	"run of max %s"
+}
+
+def aggregate(cols):
+	"""Aggregate columns of values (one per run, possibly produced one
+	after the other) into columns of min, max, mean and argmax (number
+	of the run reaching the maximum, from 1, 0 if all values are null).
+	The columns are folded one by one in running columns."""
+	n = 0
+	for col in cols:
+		if n == 0:
+			mins = array.array("q", col)
+			maxs = array.array("q", col)
+			sums = array.array("q", col)
+			args = array.array("q", bytes(8 * len(col)))
+		else:
+			args = array.array("q", [n if x > m else a for (a, m, x) in zip(args, maxs, col)])
+			mins = array.array("q", map(min, mins, col))
+			maxs = array.array("q", map(max, maxs, col))
+			sums = array.array("q", map(operator.add, sums, col))
+		n = n + 1
+	return {
+		"min":		mins,
+		"max":		maxs,
+		"mean":		array.array("q", [round(x / n) for x in sums]),
+		"argmax":	array.array("q", [a + 1 if m != 0 else 0 for (a, m) in zip(args, maxs)])
+	}
+
+
+class RunSet:
+	"""Statistics of several runs of the analysis (for instance with
+	different configurations) sharing the structure of the task. For
+	each run and statistics, only a column of the values of the blocks
+	is kept, indexed by the block numbers of the task (see get_offsets()).
+	The first run is the task itself."""
+
+	def __init__(self, task, paths):
+		self.task = task
+		self.paths = [task.path] + paths
+		self.columns = [{} for p in self.paths]
+		self.aggregates = {}
+		self.offsets = None
+		self.size = 0
+		self.line_map = None
+		self.line_keys = None
+		cfg = os.path.join(task.path, "cfg.csv")
+		for p in paths:
+			pcfg = os.path.join(p, "cfg.csv")
+			if os.path.exists(find_file(pcfg)) and not same_content(cfg, pcfg):
+				warn("CFGs of %s differ from the task: blocks are matched by address." % p)
+
+	def get_offsets(self):
+		"""Get the number of the first block of each CFG in the columns."""
+		if self.offsets == None:
+			offs = []
+			n = 0
+			for g in self.task.cfgs:
+				offs.append(n)
+				n = n + len(g.verts)
+			self.size = n
+			self.offsets = offs
+		return self.offsets
+
+	def get_column(self, run, stat):
+		"""Get the column of the blocks for the given run and statistics."""
+		try:
+			return self.columns[run][stat.name]
+		except KeyError:
+			pass
+		offs = self.get_offsets()
+		if run == 0:
+			stat.ensure_load()
+			col = array.array("q",
+				[v.get_val(stat) for g in self.task.cfgs for v in g.verts])
+		else:
+			col = array.array("q", bytes(8 * self.size))
+			path = os.path.join(self.paths[run], os.path.basename(stat.path))
+			try:
+				for fs in CSV(path).read_all():
+					for b in self.task.find_blocks(int(fs[1], 16), fs[3]):
+						col[offs[b.cfg.id] + b.id] += int(fs[0])
+			except OSError as e:
+				warn("cannot read %s: %s" % (path, e))
+		self.columns[run][stat.name] = col
+		return col
+
+	def get_line_map(self):
+		"""Get the pairs (block number, [line number]) giving the source
+		lines of the blocks. Source lines are numbered in the order of
+		line_keys, the list of pairs (source, line index)."""
+		if self.line_map == None:
+			task = self.task
+			offs = self.get_offsets()
+			lmap = []
+			keys = {}
+			if task.sview != None:
+				for g in task.cfgs:
+					for v in g.verts:
+						if v.type == BLOCK_CODE:
+							ls = [(task.sman.find(f), l) for (_, (f, l)) in task.sview.get(g, v)]
+							ls = [keys.setdefault((src, l), len(keys)) for (src, l) in ls if src != None]
+							if ls != []:
+								lmap.append((offs[g.id] + v.id, ls))
+			self.line_keys = list(keys)
+			self.line_map = lmap
+		return self.line_map
+
+	def get_lines(self, col):
+		"""Compute the column of the source lines (numbered as in
+		line_keys) from a column of the blocks."""
+		lmap = self.get_line_map()
+		res = array.array("q", bytes(8 * len(self.line_keys)))
+		for (i, ls) in lmap:
+			x = col[i]
+			if x != 0:
+				for k in ls:
+					res[k] += x
+		return res
+
+	def aggregate(self, stat):
+		"""Get the aggregation of the statistics over the runs for the
+		blocks, the functions and the source lines."""
+		try:
+			return self.aggregates[stat.name]
+		except KeyError:
+			return FLIGHTS.do((self, "aggregate", stat.name), partial(self.compute, stat))
+
+	def compute(self, stat):
+		try:
+			return self.aggregates[stat.name]
+		except KeyError:
+			pass
+		cols = [self.get_column(i, stat) for i in range(0, len(self.paths))]
+		offs = self.get_offsets()
+		self.get_line_map()
+		agg = {
+			"block":	aggregate(cols),
+			"function":	aggregate(array.array("q", [sum(col[o:o + len(g.verts)])
+							for (g, o) in zip(self.task.cfgs, offs)]) for col in cols),
+			"line":		(self.line_keys, aggregate(self.get_lines(col) for col in cols))
+		}
+		self.aggregates[stat.name] = agg
+		return agg
+
+	def reset(self, stat):
+		"""Forget the aggregation of the statistics after the task
+		statistics has been reloaded."""
+		self.columns[0].pop(stat.name, None)
+		self.aggregates.pop(stat.name, None)
+
+
+class AggregateStatistic(Statistic):
+	"""Statistic aggregating a statistic of the task over the runs of
+	a run set with op, one of AGGREGATES."""
+
+	def __init__(self, runs, stat, op):
+		Statistic.__init__(self, runs.task, op + "-" + stat.name, stat.path)
+		self.runs = runs
+		self.stat = stat
+		self.op = op
+		self.categorical = op == "argmax"
+
+	def preload(self):
+		self.stat.ensure_preload()
+		self.label = AGGREGATE_LABELS[self.op] % self.stat.label
+		self.description = self.stat.description
+		if self.op != "argmax":
+			self.unit = self.stat.unit
+			self.line_op = self.stat.line_op
+			self.concat_op = self.stat.concat_op
+			self.context_op = self.stat.context_op
+		self.defs = {"Run %d" % (i + 1): p for (i, p) in enumerate(self.runs.paths)}
+
+	def load(self):
+		agg = self.runs.aggregate(self.stat)
+		task = self.task
+
+		# blocks and functions
+		task.begin_stat(self)
+		col = agg["block"][self.op]
+		fcol = agg["function"][self.op]
+		for (g, o) in zip(task.cfgs, self.runs.get_offsets()):
+			for v in g.verts:
+				x = col[o + v.id]
+				if x != 0:
+					v.set_val(self, x)
+			g.end_stat(self)
+			g.sum.set_val(self, fcol[g.id])
+
+		# source lines
+		keys, lines = agg["line"]
+		for ((src, l), x) in zip(keys, lines[self.op]):
+			if x != 0:
+				task.sman.max.max_val(self, src.collect(l, self, x))
+
+		# run numbers are neither summed nor ranked
+		if self.categorical:
+			task.max.set_val(self, len(self.runs.paths))
+			task.sman.max.set_val(self, len(self.runs.paths))
+			self.hotspots = {"block": [], "line": [], "function": []}
+		else:
+			task.sum_stat(self)
+			self.make_hotspots()
+
+	def reload(self):
+		self.runs.reset(self.stat)
+		Statistic.reload(self)
+
+
 ######### Template preprocessing #########
 
-EXPAND_VAR = re.compile(r"([^\$]*)\$\{([^\}]*)\}(.*)")
+EXPAND_VAR = LazyRE(r"([^\$]*)\$\{([^\}]*)\}(.*)")
 
 def preprocess(path, map):
 	"""Preprocess the given path containing string of the form ${ID}
@@ -1216,8 +2700,18 @@ def preprocess(path, map):
 	return out.to_utf8()
 
 		
+LOAD_PHASES = ["error", "cfg", "views", "stats", "ready"]
+
+def loaded(phase):
+	"""Test if the task loading has reached the given phase."""
+	return PROGRESS == None \
+		or LOAD_PHASES.index(PROGRESS.phase) >= LOAD_PHASES.index(phase)
+
+
 def get_functions():
 	"""Generate HTML to access functions."""
+	if not loaded("views"):
+		return ""
 	out = StringBuffer()
 	n = 0
 	fns = []
@@ -1226,7 +2720,7 @@ def get_functions():
 		n = n + 1
 	fns.sort()
 	for (l, n) in fns:
-		display_name = cxxfilt.demangle(l)
+		display_name = demangle(l)
 		out.write(
 			'<div><a href="javascript:open_function(%s, \'%s\');">%s</a></div>' \
 			% (n, l, display_name)
@@ -1237,6 +2731,8 @@ def get_functions():
 
 def get_sources():
 	"""Generate HTML to access the sources of the current task."""
+	if not loaded("stats"):
+		return ""
 	out = StringBuffer()
 	srcs = list(TASK.get_sources())
 	srcs.sort(key = lambda s: s.name)
@@ -1247,12 +2743,16 @@ def get_sources():
 
 
 def get_stats():
-	for s in TASK.stats:
-		s.ensure_preload()
 	out = StringBuffer()
 	out.write('<option selected>No stat.</option>')
+	if not loaded("ready"):
+		return out.to_str()
+	for s in TASK.stats:
+		s.ensure_preload()
 	for s in TASK.stats:
-		out.write("<option>%s</option>" % cxxfilt.demangle(s.label))
+		out.write("<option%s%s>%s</option>"
+			% (' data-delta="1"' if s.delta else "",
+			' data-categorical="1"' if s.categorical else "", demangle(s.label)))
 	return out.to_str()
 
 
@@ -1263,17 +2763,14 @@ def get_stat_colors():
 	for i in range(1, len(COLORS)):
 		out.write(', "%s"' % COLORS[i])
 	out.write(");\n")
+	out.write("var DIFF_COLORS = [%s];\n" % ", ".join(
+		"[%s]" % ", ".join('"%s"' % c for c in cs) for cs in DIFF_COLORS))
+	out.write("var RUN_COLORS = [%s];\n" % ", ".join('"%s"' % c for c in RUN_COLORS))
 	return out.to_str();
 
-def get_bb_map():
-	out = StringBuffer()
-	out.write("var BB_map = new Map([")
-	for k in BB_DICT.keys():
-		out.write(f'[{k}, ["{BB_DICT[k][0]}", "{BB_DICT[k][1]}"]],')
-	out.write("]);\n")
-	return out.to_str()
-
 def get_views():
+	if not loaded("views"):
+		return ""
 	out = StringBuffer()
 	for i in range(0, len(TASK.views)):
 		view = TASK.views[i]
@@ -1284,12 +2781,14 @@ def get_views():
 				"checked " if view == TASK.sview else "",
 				i,
 				i,
-				cxxfilt.demangle(view.label)
+				demangle(view.label)
 			))
 	return out.to_str()
 
 
 def get_view_mask():
+	if not loaded("views"):
+		return "0"
 	for i in range(0, len(TASK.views)):
 		view = TASK.views[i]
 		if view == TASK.sview:
@@ -1302,14 +2801,231 @@ INDEX_MAP = {
 	"sources":		get_sources,
 	"stats":		get_stats,
 	"stat-colors":	get_stat_colors,
-	"get-bb-function-map":	    get_bb_map,
-	"application":	lambda: os.path.basename(os.path.splitext(TASK.exec)[0]),
-	"task":			lambda: TASK.name,
+	"application":	lambda: os.path.basename(os.path.splitext(TASK_ARGS[0])[0]),
+	"task":			lambda: TASK_ARGS[1],
 	"views":		get_views,
-	"view-mask":	get_view_mask
+	"view-mask":	get_view_mask,
+	"watch":		lambda: "true" if WATCH else "false",
+	"static":		lambda: "true" if EXPORT else "false",
+	"layers":		lambda: "true" if VIEW_LAYERS and not EXPORT else "false",
+	"loading":		lambda: "false" if loaded("ready") else "true"
 }
 
 
+######### Metrics #########
+
+TIME_BUCKETS = [.001, .005, .01, .05, .1, .5, 1., 5., 10., 30.]
+SIZE_BUCKETS = [1 << 10, 1 << 14, 1 << 17, 1 << 20, 1 << 23, 1 << 26]
+
+def format_labels(names, values):
+	if not names:
+		return ""
+	return "{%s}" % ",".join('%s="%s"' % (n, str(v).replace('"', '\\"'))
+		for (n, v) in zip(names, values))
+
+
+class Metric:
+	"""Metric exported in Prometheus text format. Values are indexed by
+	the tuple of their label values."""
+
+	def __init__(self, name, help, type, labels = ()):
+		self.name = name
+		self.help = help
+		self.type = type
+		self.labels = labels
+		self.lock = Lock()
+		METRICS.append(self)
+
+	def gen(self, out):
+		out.write("# HELP %s %s\n" % (self.name, self.help))
+		out.write("# TYPE %s %s\n" % (self.name, self.type))
+		self.gen_values(out)
+
+	def gen_values(self, out):
+		pass
+
+
+class Counter(Metric):
+
+	def __init__(self, name, help, labels = ()):
+		Metric.__init__(self, name, help, "counter", labels)
+		self.values = {}
+
+	def inc(self, *labels):
+		with self.lock:
+			self.values[labels] = self.values.get(labels, 0) + 1
+
+	def gen_values(self, out):
+		with self.lock:
+			for (l, x) in sorted(self.values.items()):
+				out.write("%s%s %d\n" % (self.name, format_labels(self.labels, l), x))
+
+
+class Gauge(Metric):
+	"""Gauge whose values are computed by fun at scrape time: fun
+	returns a list of pairs (label values, value). Counters maintained
+	outside of the metrics are exported with type "counter"."""
+
+	def __init__(self, name, help, fun, labels = (), type = "gauge"):
+		Metric.__init__(self, name, help, type, labels)
+		self.fun = fun
+
+	def gen_values(self, out):
+		for (l, x) in self.fun():
+			out.write("%s%s %s\n" % (self.name, format_labels(self.labels, l), x))
+
+
+class Histogram(Metric):
+
+	def __init__(self, name, help, buckets, labels = ()):
+		Metric.__init__(self, name, help, "histogram", labels)
+		self.buckets = buckets
+		self.values = {}
+
+	def observe(self, x, *labels):
+		with self.lock:
+			try:
+				v = self.values[labels]
+			except KeyError:
+				v = [[0] * len(self.buckets), 0, 0]
+				self.values[labels] = v
+			for i in range(0, len(self.buckets)):
+				if x <= self.buckets[i]:
+					v[0][i] = v[0][i] + 1
+			v[1] = v[1] + x
+			v[2] = v[2] + 1
+
+	def gen_values(self, out):
+		names = self.labels + ("le",)
+		with self.lock:
+			for (l, (counts, sum, count)) in sorted(self.values.items()):
+				for (b, n) in zip(self.buckets, counts):
+					out.write("%s_bucket%s %d\n" % (self.name, format_labels(names, l + (b,)), n))
+				out.write("%s_bucket%s %d\n" % (self.name, format_labels(names, l + ("+Inf",)), count))
+				out.write("%s_sum%s %s\n" % (self.name, format_labels(self.labels, l), sum))
+				out.write("%s_count%s %d\n" % (self.name, format_labels(self.labels, l), count))
+
+
+def load_times():
+	if TASK == None:
+		return []
+	res = [(("task", "cfg.csv"), TASK.read_time)]
+	for v in TASK.views:
+		if v.load_time != None:
+			res.append((("view", v.name), v.load_time))
+	for s in TASK.stats:
+		if s.load_time != None:
+			res.append((("stat", s.name), s.load_time))
+	return res
+
+
+def task_sizes():
+	if TASK == None:
+		return []
+	res = [
+		(("cfgs",), len(TASK.cfgs)),
+		(("blocks",), sum(len(g.verts) for g in TASK.cfgs)),
+		(("stats",), len(TASK.stats)),
+		(("sources",), len(TASK.get_sources()))
+	]
+	return res
+
+
+def view_items():
+	if TASK == None:
+		return []
+	return [((v.name,), v.count_items()) for v in TASK.views]
+
+
+def cache_ratio():
+	n = RENDER_CACHE.hits + RENDER_CACHE.misses
+	return [((), RENDER_CACHE.hits / n if n else 0)]
+
+
+def resident_memory():
+	try:
+		with open("/proc/self/statm") as f:
+			return [((), int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))]
+	except (OSError, ValueError, IndexError):
+		return []
+
+
+METRICS = []
+REQUESTS = Counter("obviews_requests_total",
+	"Number of HTTP requests.", ("route", "code"))
+REQUEST_TIME = Histogram("obviews_request_seconds",
+	"Processing time of HTTP requests.", TIME_BUCKETS, ("route",))
+DOT_TIME = Histogram("obviews_dot_seconds",
+	"Duration of dot renders.", TIME_BUCKETS)
+DOT_SIZE = Histogram("obviews_dot_output_bytes",
+	"Size of the SVG produced by dot.", SIZE_BUCKETS)
+DEGRADED_RENDERS = Counter("obviews_degraded_renders_total",
+	"Number of CFG renderings degraded after a dot timeout.", ("level",))
+WARMUP_RENDERS = Counter("obviews_warmup_renders_total",
+	"Number of CFGs rendered in advance by the warm-up.")
+Gauge("obviews_load_seconds", "Loading time of the task files.",
+	load_times, ("kind", "name"))
+Gauge("obviews_cache_hits_total", "Hits in the render cache.",
+	lambda: [((), RENDER_CACHE.hits)], type = "counter")
+Gauge("obviews_cache_misses_total", "Misses in the render cache.",
+	lambda: [((), RENDER_CACHE.misses)], type = "counter")
+Gauge("obviews_cache_hit_ratio", "Hit ratio of the render cache.",
+	cache_ratio)
+Gauge("obviews_cache_entries", "Number of renders in the render cache.",
+	lambda: [((), len(RENDER_CACHE.map))])
+Gauge("obviews_task_size", "Size of the loaded task.", task_sizes, ("item",))
+Gauge("obviews_view_items", "Number of items of the loaded views.",
+	view_items, ("view",))
+Gauge("obviews_resident_bytes", "Resident memory of the process.",
+	resident_memory)
+
+
+######### Profiling #########
+
+PROFILE_DIR = None
+PROFILE_SAMPLE = 0
+PROFILE_LOCK = Lock()
+PROFILE_COUNT = 0
+
+def write_startup_profile(task):
+	"""Write the timings of the task loading in the profile directory."""
+	total = sum(t for (_, t) in task.timings)
+	with open(os.path.join(PROFILE_DIR, "startup.json"), "w") as out:
+		json.dump({"total": total, "phases": task.timings}, out, indent = 1)
+	with open(os.path.join(PROFILE_DIR, "startup.txt"), "w") as out:
+		for (phase, t) in task.timings:
+			out.write("%-40s %10.3f s %6.1f%%\n" % (phase, t, t * 100. / total if total else 0))
+		out.write("%-40s %10.3f s\n" % ("total", total))
+	info("start-up profile written to %s" % PROFILE_DIR)
+
+
+def select_profile(query):
+	"""Select if a request has to be profiled: in debug mode when it
+	has the profile=1 query, or one request over PROFILE_SAMPLE.
+	Return the number of the profile or None."""
+	global PROFILE_COUNT
+	if PROFILE_DIR == None:
+		return None
+	with PROFILE_LOCK:
+		PROFILE_COUNT = PROFILE_COUNT + 1
+		n = PROFILE_COUNT
+	if DEBUG and query.get("profile") == "1":
+		return n
+	if PROFILE_SAMPLE != 0 and n % PROFILE_SAMPLE == 0:
+		return n
+	return None
+
+
+def write_request_profile(prof, n, path):
+	"""Write the profile of a request as .pstats and as a summary."""
+	import pstats
+	name = "request-%05d-%s" % (n, path.split("?")[0].split("/")[1] or "index")
+	prof.dump_stats(os.path.join(PROFILE_DIR, name + ".pstats"))
+	with open(os.path.join(PROFILE_DIR, name + ".txt"), "w") as out:
+		out.write("%s\n\n" % path)
+		pstats.Stats(prof, stream = out).sort_stats("cumulative").print_stats(30)
+
+
 ######### Server management #########
 
 def do_stop(comps, query = {}):
@@ -1317,6 +3033,26 @@ def do_stop(comps, query = {}):
 	return 666, {}, "".encode('utf-8')
 
 
+def do_metrics(comps, query):
+	"""Return the metrics in Prometheus text format."""
+	out = StringBuffer()
+	for m in METRICS:
+		m.gen(out)
+	return 200, {"Content-Type": "text/plain; version=0.0.4"}, out.to_utf8()
+
+
+def do_status(comps, query):
+	"""Return the progress of the task loading."""
+	return 200, {"Content-Type": "application/json"}, \
+		json.dumps(PROGRESS.to_json()).encode("utf-8")
+
+
+def do_index_part(comps, query):
+	"""Return a part of the index page."""
+	return 200, {"Content-Type": "text/html; charset=utf-8"}, \
+		INDEX_MAP[comps[0]]().encode("utf-8")
+
+
 def do_source(comps, query = {}):
 	path = "/".join(comps)
 	try:
@@ -1336,7 +3072,7 @@ def do_source(comps, query = {}):
 def do_source_stat(comps, query):
 	stat = TASK.stats[int(query["stat"]) - 1]
 	stat.ensure_load()
-	path = parsep(query["id"])
+	path = query["id"]
 	source = TASK.find_source(path)
 	assert source != None
 	out = StringBuffer();
@@ -1348,13 +3084,11 @@ def do_source_stat(comps, query):
 	return 200, {"content-Type": "text/plain"}, out.make()
 
 
-def do_function(comps, query):
-	g = TASK.cfgs[int(comps[0])]
-
-	# define statistics decorator
+def make_decorator(query, sdec):
+	"""Build the decorator of a CFG with the views selected in the
+	query and the given statistics decorator."""
 	for s in TASK.stats:
 		s.ensure_load()
-	sdec = StatDecorator(TASK)
 
 	# decorate with source
 	#vdec = ViewDecorator([TASK.sview])
@@ -1366,39 +3100,214 @@ def do_function(comps, query):
 	vdec = ViewDecorator(views)
 
 	# put all together
-	dec = SeqDecorator([vdec, sdec])
+	return SeqDecorator([vdec, sdec])
+
+
+RENDER_CACHE = Cache(64)
+
+RENDER_TIMEOUT = 10.
+RENDER_LEVELS = {}
+RENDER_FULL = 0
+RENDER_NO_VIEW = 1
+RENDER_FAST = 2
+RENDER_LIST = 3
+RENDER_NOTES = [
+	None,
+	"views are not displayed",
+	"views are not displayed and the layout is simplified",
+	"the CFG is displayed as a list of blocks"
+]
+FAST_LAYOUT = ["-Gnslimit=1", "-Gnslimit1=1", "-Gmclimit=.1", "-Gsplines=line"]
+
+def gen_svg(g, dec, key, lod = None, sdec = None):
+	"""Generate the SVG answer for CFG g decorated with dec. Key
+	identifies the render in the render cache and is made of the kind of
+	render, the CFG identifier and the view mask. If a level of detail
+	is given, it is used to generate the CFG.
+
+	If dot exceeds RENDER_TIMEOUT, the rendering is degraded: first
+	without the views (only sdec is used), then with a simplified layout
+	and at last as a list of blocks. The reached level is remembered
+	for the CFG whatever the view mask."""
+	if lod != None:
+		key = key + lod.key()
+	return 200, {}, cached_render(key, partial(render_cfg, g, dec, key, lod, sdec))
+
+
+def cached_render(key, fun):
+	"""Get the rendering identified by key from the render cache or
+	compute it with fun (that puts it in the cache when it succeeds).
+	Concurrent requests of the same rendering share the computation.
+	Renderings started before the task is fully loaded miss statistics
+	and are not cached."""
+	data = RENDER_CACHE.get(key)
+	if data == None:
+		data = FLIGHTS.do(("render", loaded("ready")) + key,
+			lambda: RENDER_CACHE.peek(key) or fun())
+	return data
+
+
+def render_cfg(g, dec, key, lod, sdec):
+	"""Render the CFG for gen_svg() and return the answer."""
+	import subprocess
+	ready = loaded("ready")
+	slow = key[:2] + key[3:]
+	if sdec == None:
+		sdec = StatDecorator(TASK)
+
+	# render with the cheapest known level
+	level = RENDER_LEVELS.get(slow, RENDER_FULL)
+	while level != RENDER_LIST:
+		out = StringBuffer()
+		d = dec if level == RENDER_FULL else SeqDecorator([sdec])
+		if lod == None:
+			g.gen(d, out)
+		else:
+			lod.gen(d, out)
+		try:
+			http_response = render_svg(out.to_str(), RENDER_TIMEOUT or None,
+				FAST_LAYOUT if level == RENDER_FAST else [])
+			break
+		except subprocess.TimeoutExpired:
+			level = level + 1
+			RENDER_LEVELS[slow] = level
+			DEGRADED_RENDERS.inc(str(level))
+			warn("rendering of CFG %s timed out: %s." % (g.label, RENDER_NOTES[level]))
+	if level == RENDER_LIST:
+		http_response = gen_block_list(g, sdec)
+	if http_response == None:
+		return render_error()
+
+	# add the notices
+	info = StringBuffer()
+	if lod != None and level != RENDER_LIST:
+		lod.gen_info(info)
+	if level != RENDER_FULL:
+		info.write("<b>Degraded rendering</b> (dot took more than %s s): %s. " \
+			% (RENDER_TIMEOUT, RENDER_NOTES[level]))
+	if info.to_str() != "":
+		http_response = http_response + \
+			('<div class="render-info">%s</div>' % info.to_str()).encode("utf-8")
+	if ready:
+		RENDER_CACHE.put(key, http_response)
+	return http_response
+
+
+def gen_block_list(g, sdec):
+	"""Generate the list of blocks of a CFG with their statistics,
+	used when the CFG cannot be laid out in time."""
+	out = StringBuffer()
+	out.write('<div class="block-list"><table><tr><th>Block</th><th>Address</th><th>Size</th>')
+	for stat in TASK.stats:
+		out.write("<th>%s</th>" % escape_html(demangle(stat.label)))
+	out.write("</tr>")
+	for v in g.verts:
+		out.write('<tr id="node%d"><td>BB %d</td>' % (v.id + 1, v.id))
+		if v.type == BLOCK_CODE:
+			out.write("<td>%x</td><td>%d</td>" % (v.base, v.size))
+		elif v.type == BLOCK_CALL and v.callee != None:
+			out.write("""<td colspan="2"><a href="javascript:call_function(%d, '%s')">call %s</a></td>""" \
+				% (v.callee.id, v.callee.label, escape_html(demangle(v.callee.label))))
+		else:
+			out.write('<td colspan="2">%s</td>' % BLOCK_LABEL_MAP.get(v.type, "call"))
+		for stat in TASK.stats:
+			out.write("<td>%d</td>" % sdec.get_val(v, stat))
+		out.write("</tr>")
+	out.write("</table></div>")
+	return out.to_utf8()
+
 
-	# generate the dot
+def render_svg(dot, timeout = None, args = []):
+	"""Run dot on the given dot text and return the post-processed SVG
+	or None if dot fails."""
+	r = run_dot(dot, ["-Tsvg"] + args, timeout)
+	if r == None:
+		return None
+	return postprocess_svg(r.decode()).encode()
+
+
+def run_dot(dot, args, timeout = None):
+	"""Run dot on the given dot text with the given arguments and return
+	its output or None if dot fails (the faulty .dot file is kept). If
+	the timeout expires, dot is killed and subprocess.TimeoutExpired is
+	raised."""
+	import subprocess
+	import tempfile
 	(handle, path)  = tempfile.mkstemp(suffix=".dot", text=True)
 	out = os.fdopen(handle, "w")
-	g.gen(dec, out)
+	out.write(dot)
 	out.close()
-
-	# generate the SVG
-	r = subprocess.run([DOT_PATH, path, "-Tsvg"], capture_output = True)
+	t = time.perf_counter()
+	try:
+		r = subprocess.run([DOT_PATH, path] + args,
+			capture_output = True, timeout = timeout)
+	except subprocess.TimeoutExpired:
+		DOT_TIME.observe(time.perf_counter() - t)
+		os.remove(path)
+		raise
+	DOT_TIME.observe(time.perf_counter() - t)
+	DOT_SIZE.observe(len(r.stdout))
 	if r.returncode != 0:
 		print("ERROR: faulty .dot file:", path)
-		return (
-			200,
-			{},
-			StringBuffer("<p>Cannot generate the CFG: %s</p>" % r.returncode).to_xml()
-		)
-
-	# send the SVG
+		return None
 	os.remove(path)
-	http_response = postprocess_svg(r.stdout.decode()).encode()
-	return 200, {}, http_response
+	return r.stdout
+
+
+def gen_layered_svg(g, kind, lod = None, sdec = None):
+	"""Generate the SVG answer for CFG g with the lines of all views,
+	tagged so that the browser shows only the selected ones. Hence the
+	rendering does not depend on the view mask and is made once for
+	all view selections."""
+	if sdec == None:
+		sdec = StatDecorator(TASK)
+	key = (kind, g.id, (1 << len(TASK.views)) - 1, "layers")
+	return gen_svg(g, SeqDecorator([LayeredViewDecorator(TASK.views), sdec]), key, lod, sdec)
+
+
+def render_error():
+	"""Answer for a CFG that cannot be rendered."""
+	return StringBuffer("<p>Cannot generate the CFG.</p>").to_xml()
+
+
+def do_function(comps, query):
+	g = TASK.cfgs[int(comps[0])]
+	sdec = StatDecorator(TASK)
+	if query.get("layers") == "1":
+		return gen_layered_svg(g, "function", get_lod(g, sdec, query), sdec)
+	return gen_svg(g,
+		make_decorator(query, sdec),
+		("function", g.id, int(query['vmask'])),
+		get_lod(g, sdec, query), sdec)
+
+
+def do_function_merged(comps, query):
+	"""Display the CFG of a function with statistics merged over
+	all its contexts."""
+	f = TASK.cfgs[int(comps[0])].function
+	sdec = MergedStatDecorator(TASK, f)
+	if query.get("layers") == "1":
+		return gen_layered_svg(f.get_cfg(), "function-merged", get_lod(f.get_cfg(), sdec, query), sdec)
+	return gen_svg(f.get_cfg(),
+		make_decorator(query, sdec),
+		("function-merged", f.get_cfg().id, int(query['vmask'])),
+		get_lod(f.get_cfg(), sdec, query), sdec)
+
+NODE_TAG_RE = LazyRE(r"(<g\s+id=(\"[^\"]*\"|'[^']*')\s+class\s*=(\"\s*node\s*\"|'\s*node\s*'))")
+TITLE_TAG_RE = LazyRE(r"<title\b[^>]*>(.*?)</title>")
+TITLE_ATTRIBUTE_RE = LazyRE(r"xlink:title=(\"[^\"]*\"|'[^']*')")
+LAYER_TAG_RE = LazyRE(r"<g\s+id=\"((?:a_)?layer(\d+)_)")
 
 def postprocess_svg(text):
 		# Insert javascript function call foreach node in the SVG
-		node_tag_regex = re.compile(r"(<g\s+id=(\"[^\"]*\"|'[^']*')\s+class\s*=(\"\s*node\s*\"|'\s*node\s*'))")
-		result = node_tag_regex.sub(r"\g<1> onclick='javascript:cfg_center_block_by_id(\g<2>)'",text)
+		result = NODE_TAG_RE.sub(r"\g<1> onclick='javascript:cfg_center_block_by_id(\g<2>)'",text)
 
 		# Remove tooltip and title tags
-		title_tag_regex = re.compile(r"<title\b[^>]*>(.*?)</title>")
-		title_attribute_regex = re.compile(r"xlink:title=(\"[^\"]*\"|'[^']*')")
-		result = title_tag_regex.sub("",result)
-		result = title_attribute_regex.sub("",result)
+		result = TITLE_TAG_RE.sub("",result)
+		result = TITLE_ATTRIBUTE_RE.sub("",result)
+
+		# Tag the view layers
+		result = LAYER_TAG_RE.sub(r'<g class="layer" data-layer="\g<2>" id="\g<1>', result)
 
 		return result
 
@@ -1420,68 +3329,309 @@ def do_function_stat(comps, query):
 	return 200, {"content-Type": "text/plain"}, out.to_utf8()
 
 
+def do_function_merged_stat(comps, query):
+	stat = TASK.stats[int(query["stat"]) - 1]
+	stat.ensure_load()
+	f = TASK.cfgs[int(query["id"])].function
+	col = f.column(stat)
+	out = StringBuffer()
+	out.write(str(max([TASK.get_max(stat)] + col)))
+	for v in f.get_cfg().verts:
+		x = 0
+		if v.type == BLOCK_CALL and v.callee:
+			if len(v.next) and v.next[0].snk:
+				x = col[v.next[0].snk.id]
+		else:
+			x = col[v.id]
+		if x != 0:
+			out.write(" %d %d" % (v.id, x))
+	return 200, {"content-Type": "text/plain"}, out.to_utf8()
+
+
 def do_stat_info(comps, query):
 	stat = TASK.stats[int(query["stat"]) - 1]
 	out = StringBuffer()
 	out.write("<div>")
 	for (k, v) in stat.defs.items():
 		out.write("<b>%s:</b> %s<br/>" % (k, v))
+	if stat.categorical:
+		out.write("</div>")
+		return 200, {}, out.to_xml()
+	if EXPORT:
+		flame = export_name("/flame", {"stat": query["stat"]})
+	else:
+		flame = "flame?stat=%s" % query["stat"]
+	out.write('<a href="%s" download>Export flame graph</a><br/>' % flame)
+	out.write('<b>Hotspots:</b> ')
+	out.write('<a href="javascript:show_hotspots(\'block\');">blocks</a>, ')
+	out.write('<a href="javascript:show_hotspots(\'line\');">lines</a>, ')
+	out.write('<a href="javascript:show_hotspots(\'function\');">functions</a>')
+	out.write('<div id="hotspots"></div>')
 	out.write("</div>")
 	return 200, {}, out.to_xml()
 
 
+def do_call_tree(comps, query):
+	"""Return the call tree with exclusive and inclusive values of the
+	statistics as JSON. Nodes are listed in pre-order and refer to their
+	parent by CFG identifier."""
+	if "stat" in query:
+		stats = [TASK.stats[int(query["stat"]) - 1]]
+	else:
+		stats = TASK.stats
+	for s in stats:
+		s.ensure_load()
+	nodes = []
+	for g in TASK.call_order:
+		nodes.append({
+			"id": g.id,
+			"label": demangle(g.label),
+			"parent": g.parent.id if g.parent != None else None,
+			"excl": [g.sum.get_val(s) for s in stats],
+			"incl": [g.incl.get_val(s) for s in stats]
+		})
+	res = {
+		"stats": [demangle(s.label) for s in stats],
+		"nodes": nodes
+	}
+	return 200, {"Content-Type": "application/json"}, json.dumps(res).encode("utf-8")
+
+
+def do_flame(comps, query):
+	"""Return the call tree in collapsed stack format."""
+	stat = TASK.stats[int(query["stat"]) - 1]
+	stat.ensure_load()
+	out = StringBuffer()
+	TASK.gen_flame(stat, out)
+	return 200, {
+			"Content-Type": "text/plain; charset=utf-8",
+			"Content-Disposition": 'attachment; filename="%s-%s.folded"' % (TASK.name, stat.name)
+		}, out.to_utf8()
+
+
+def do_hotspots(comps, query):
+	"""Return the k biggest blocks, lines or functions for a statistics.
+	At most HOTSPOT_MAX items are ranked: a bigger k is reported as
+	capped."""
+	try:
+		n = int(query["stat"])
+		k = int(query.get("k", 10))
+	except (KeyError, ValueError):
+		return 400, {"Content-Type": "text/plain"}, b"bad stat or k"
+	by = query.get("by", "block")
+	if n < 1 or n > len(TASK.stats) or k < 0 or by not in ("function", "block", "line"):
+		return 400, {"Content-Type": "text/plain"}, b"bad stat, k or by"
+	stat = TASK.stats[n - 1]
+	stat.ensure_load()
+	if stat.delta:
+		total = stat.base.get_sum()
+	else:
+		total = TASK.get_sum(stat)
+	out = StringBuffer()
+	out.write("<table>")
+	for h in stat.hotspots[by][:k]:
+		x = h[0]
+		if by == "block":
+			g = TASK.cfgs[h[1]]
+			out.write("""<tr><td><a href="javascript:open_function(%d, '%s', %d);">%s BB %d</a></td>""" \
+				% (g.id, g.label, h[2], demangle(g.label), h[2]))
+		elif by == "line":
+			out.write("""<tr><td><a href="javascript:show_source('%s', %d);">%s:%d</a></td>""" \
+				% (h[1], h[2], os.path.basename(h[1]), h[2]))
+		else:
+			g = TASK.cfgs[h[1]]
+			out.write("""<tr><td><a href="javascript:open_function(%d, '%s');">%s</a></td>""" \
+				% (g.id, g.label, demangle(g.label)))
+		out.write("<td>%d</td><td>%3.2f%%</td></tr>" \
+			% (x, (x * 100. / total) if total else 0))
+	out.write("</table>")
+	if k > HOTSPOT_MAX:
+		out.write("<p>Only the %d first items are ranked.</p>" % HOTSPOT_MAX)
+	return 200, {"Content-Type": "text/html; charset=utf-8"}, out.to_utf8()
+
+
+def do_line_blocks(comps, query):
+	"""Return the blocks and contexts whose code comes from the given
+	source line, ranked by the given statistics if any."""
+	path = query["id"]
+	line = int(query["line"])
+	bbs = TASK.get_line_blocks(path, line)
+	stat = None
+	if int(query.get("stat", 0)) != 0:
+		stat = TASK.stats[int(query["stat"]) - 1]
+		stat.ensure_load()
+		bbs.sort(key = lambda p: abs(p[1].get_val(stat)), reverse = True)
+	out = StringBuffer()
+	out.write("<div><b>%s:%d</b> " % (os.path.basename(path), line))
+	if bbs == []:
+		out.write("no block.</div>")
+		return 200, {"Content-Type": "text/html; charset=utf-8"}, out.to_utf8()
+	out.write("<table>")
+	for (g, b) in bbs:
+		out.write("""<tr><td><a href="javascript:open_function(%d, '%s', %d);">%s BB %d</a></td>""" \
+			% (g.id, g.label, b.id, demangle(g.label), b.id))
+		ctx = []
+		for c in g.context.path():
+			if c.kind == CTX_FUN and c.cfg != None:
+				ctx.append(demangle(c.cfg.label))
+			elif c.kind == CTX_CALL and c.source != None and ctx != []:
+				ctx[-1] = "%s@%s:%d" % (ctx[-1], os.path.basename(c.source[0]), c.source[1])
+		out.write("<td>%s</td>" % " &gt; ".join(ctx))
+		if stat != None:
+			out.write("<td>%d</td>" % b.get_val(stat))
+		out.write("</tr>")
+	out.write("</table></div>")
+	return 200, {"Content-Type": "text/html; charset=utf-8"}, out.to_utf8()
+
+
+def do_locate(comps, query):
+	"""Return as JSON the blocks containing the address given in the
+	query (decimal or hexadecimal with 0x prefix) with their CFG and
+	context. Blocks of the CFG given by cfg, if any, come first."""
+	try:
+		addr = int(query["addr"], 0)
+	except (KeyError, ValueError):
+		return 400, {"Content-Type": "text/plain"}, b"bad address"
+	bbs = TASK.locate(addr)
+	if "cfg" in query:
+		cur = int(query["cfg"])
+		bbs.sort(key = lambda b: b.cfg.id != cur)
+	res = {
+		"addr": addr,
+		"blocks": [{
+			"cfg": b.cfg.id,
+			"block": b.id,
+			"node": "node%d" % (b.id + 1),
+			"label": b.cfg.label,
+			"ctx": b.cfg.ctx
+		} for b in bbs]
+	}
+	return 200, {"Content-Type": "application/json"}, json.dumps(res).encode("utf-8")
+
+
 def do_context(comps, query):
 	out = StringBuffer()
 	g = TASK.cfgs[int(query["id"])]
-	cg = TASK.cfgs[0]
-	fst = True
-	for s in g.ctx[1:-1].split(','):
-		s = s.strip()
-		if s == "":
-			break;
-		if s.startswith("FUN("):
-			cg = TASK.find_cfg(int(s[4:-1], 16))
-			if cg != None:
-				s = """<a href="javascript: open_function(%d, '%s');">%s</a>""" \
-					% (cg.id, cxxfilt.demangle(cg.label), cxxfilt.demangle(cg.label))
-		elif s.startswith("CALL("):
-			if cg != None:
-				bb = cg.find_bb(int(s[5:-1], 16))
-				if bb != None and TASK.sview != None:
-					l = TASK.sview.get(cg, bb)
-					if l != []:
-						file = l[-1][1][0]
-						line = l[-1][1][1]
-						s = """<a href="javascript: show_source('%s');">%s:%d</a>""" \
-							% (file, file, line)
-		out.write(s)
+	for c in g.context.path():
+		c.gen(out)
 		out.write('<img src="ctxsep.png" style="width: 1em;"/>')
-	out.write(cxxfilt.demangle(g.label))	
+	out.write(demangle(g.label))	
 	return 200, {"content-Type": "text/plain"}, out.to_utf8()
 	
 	
 DO_MAP = {
 	"stop": 			do_stop,
+	"status":			do_status,
+	"metrics":			do_metrics,
+	"index-part":		do_index_part,
 	"source":			do_source,
 	"source-stat":		do_source_stat,
 	"function":			do_function,
 	"function-stat":	do_function_stat,
+	"function-merged":	do_function_merged,
+	"function-merged-stat":	do_function_merged_stat,
 	"stat-info":		do_stat_info,
-	"context":			do_context
+	"context":			do_context,
+	"locate":			do_locate,
+	"line-blocks":		do_line_blocks,
+	"call-tree":		do_call_tree,
+	"flame":			do_flame,
+	"hotspots":			do_hotspots
 }
 
 
 
+STATIC_FILES = Cache(32)
+
+class StaticFile:
+	"""Open static file with its stamp (modification time and size)."""
+
+	def __init__(self, path):
+		import mimetypes
+		self.path = path
+		self.file = open(path, "rb")
+		st = os.fstat(self.file.fileno())
+		self.stamp = (st.st_mtime_ns, st.st_size)
+		self.size = st.st_size
+		self.type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+class FileRange:
+	"""Range of a static file to send."""
+
+	def __init__(self, file, offset, count):
+		self.file = file
+		self.offset = offset
+		self.count = count
+
+	def __len__(self):
+		return self.count
+
+
+def open_static(path):
+	"""Get a static file from the cache of open files, opening it if
+	needed or if it has changed. Return None if it cannot be opened.
+	Evicted files are closed by the garbage collector once their last
+	transfer is done."""
+	f = STATIC_FILES.get(path)
+	try:
+		st = os.stat(path)
+		if f == None or f.stamp != (st.st_mtime_ns, st.st_size):
+			f = StaticFile(path)
+			STATIC_FILES.put(path, f)
+		return f
+	except (OSError, ValueError):
+		return None
+
+
+def parse_range(range, size):
+	"""Parse a single-range Range header for a file of the given size.
+	Return (start, end) with end excluded, () if the range cannot be
+	satisfied or None if the header is ignored (not bytes, multiple
+	ranges or invalid)."""
+	if not range.startswith("bytes=") or "," in range:
+		return None
+	try:
+		(start, end) = range[6:].strip().split("-")
+		if start == "":
+			n = int(end)
+			if n == 0:
+				return ()
+			return (max(size - n, 0), size)
+		start = int(start)
+		end = size if end == "" else int(end) + 1
+	except ValueError:
+		return None
+	if end <= start:
+		return None
+	if start >= size:
+		return ()
+	return (start, min(end, size))
+
+
 class Handler(BaseHTTPRequestHandler):
-	"""Handle HTTP requests."""
+	"""Handle HTTP requests. Connections are kept alive (HTTP/1.1)
+	and every answer gives its length."""
+
+	protocol_version = "HTTP/1.1"
 
 	def route(self, path='', query={}):
 		"""Process a request and return the anwer."""
 
 		comps = path.split('/', 2)
 		try:
-			return DO_MAP[comps[1]](comps[2:], query)
+			fun = DO_MAP[comps[1]]
 		except KeyError:
+			fun = None
+		if fun != None:
+			if TASK == None and fun not in (do_stop, do_status, do_metrics):
+				return 503, {"Content-Type": "text/plain"}, b"task is loading"
+			TASK_LOCK.acquire_read()
+			try:
+				return fun(comps[2:], query)
+			finally:
+				TASK_LOCK.release_read()
+		else:
 			if comps[1] == "":
 				comps[1] = "index.html"
 			path = os.path.join(DATA_DIR, "/".join(comps[1:]))
@@ -1490,32 +3640,112 @@ class Handler(BaseHTTPRequestHandler):
 					{}, \
 					preprocess(path, INDEX_MAP)
 			else:
-				r = mimetypes.guess_type(path)
-				try:
-					return 200, \
-						{"Content-Type": r[0]}, \
-						open(path, 'rb').read()
-				except FileNotFoundError:
-					return 404, None, ""
+				return self.serve_file(path)
+
+	def serve_file(self, path):
+		"""Answer with a static file of DATA_DIR, possibly a range of it."""
+		path = os.path.realpath(path)
+		if os.path.commonpath([path, os.path.realpath(DATA_DIR)]) != os.path.realpath(DATA_DIR):
+			return 404, {"Content-Type": "text/plain"}, b"not found"
+		f = open_static(path)
+		if f == None:
+			return 404, {"Content-Type": "text/plain"}, b"not found"
+		headers = {"Content-Type": f.type, "Accept-Ranges": "bytes"}
+		range = self.headers.get("Range")
+		if range == None:
+			return 200, headers, FileRange(f, 0, f.size)
+		r = parse_range(range, f.size)
+		if r == None:
+			return 200, headers, FileRange(f, 0, f.size)
+		elif r == ():
+			headers["Content-Range"] = "bytes */%d" % f.size
+			return 416, headers, b""
+		else:
+			(start, end) = r
+			headers["Content-Range"] = "bytes %d-%d/%d" % (start, end - 1, f.size)
+			return 206, headers, FileRange(f, start, end - start)
+
+	def send_file(self, r):
+		"""Send a file range on the connection."""
+		offset = r.offset
+		count = r.count
+		if hasattr(os, "sendfile"):
+			try:
+				while count > 0:
+					n = os.sendfile(self.connection.fileno(), r.file.file.fileno(), offset, count)
+					if n == 0:
+						break
+					offset = offset + n
+					count = count - n
+				return
+			except OSError:
+				if offset != r.offset:
+					raise
+		with open(r.file.path, "rb") as input:
+			input.seek(offset)
+			self.wfile.write(input.read(count))
+
+	def do_events(self):
+		"""Send the task events as a server-sent event stream."""
+		self.send_response(200)
+		self.send_header("Content-Type", "text/event-stream")
+		self.send_header("Cache-Control", "no-cache")
+		self.send_header('Access-Control-Allow-Origin', '*')
+		self.send_header("Connection", "close")
+		self.end_headers()
+		self.close_connection = True
+		version = EVENTS.version
+		try:
+			while True:
+				version, events = EVENTS.wait(version, EVENT_PING)
+				if events == []:
+					self.wfile.write(b": ping\n\n")
+				for (kind, data) in events:
+					self.wfile.write(("event: %s\ndata: %s\n\n" % (kind, data)).encode("utf-8"))
+				self.wfile.flush()
+		except (BrokenPipeError, ConnectionResetError):
+			pass
 
 	def do_GET(self):
 	
 		# parse URL
 		urlP = urllib.parse.urlparse(self.path)
-		query = {t[0] : t[1] for t in [p.split('=') if '=' in p else [p,''] for p in urlP.query.split('&')]}
+		path = urllib.parse.unquote(urlP.path)
+		query = dict(urllib.parse.parse_qsl(urlP.query, keep_blank_values = True))
+		if path == "/events" and WATCH:
+			self.do_events()
+			return
 
 		# manage the request
 		quit = False
-		if not DEBUG:
-			response_code , headers, data = self.route(urlP.path, query)
-		else:
-			try:
-				response_code , headers, data = self.route(urlP.path, query)
-			except Exception as err:
-				print(err)
-				response_code = 500
-				headers = {}
-				data = str(err).encode('utf-8')
+		start = time.perf_counter()
+		profile = select_profile(query)
+		if profile != None:
+			import cProfile
+			prof = cProfile.Profile()
+			prof.enable()
+		ACTIVITY.enter()
+		try:
+			if not DEBUG:
+				response_code , headers, data = self.route(path, query)
+			else:
+				try:
+					response_code , headers, data = self.route(path, query)
+				except Exception as err:
+					print(err)
+					response_code = 500
+					headers = {}
+					data = str(err).encode('utf-8')
+		finally:
+			ACTIVITY.leave()
+			if profile != None:
+				prof.disable()
+				write_request_profile(prof, profile, self.path)
+		route = path.split('/')[1]
+		if route not in DO_MAP:
+			route = "static"
+		REQUEST_TIME.observe(time.perf_counter() - start, route)
+		REQUESTS.inc(route, response_code if response_code != 666 else 204)
 		if response_code == 666:
 			quit = True
 			response_code = 204
@@ -1532,12 +3762,28 @@ class Handler(BaseHTTPRequestHandler):
 			for key in headers:
 				self.send_header(key, headers[key])
 		self.send_header('Access-Control-Allow-Origin', '*')
+		if code != 204:
+			self.send_header("Content-Length", str(len(data)))
+		if quit:
+			self.send_header("Connection", "close")
+			self.close_connection = True
 		self.end_headers()
-		self.wfile.write(data)
+		if code == 204:
+			pass
+		elif isinstance(data, FileRange):
+			self.send_file(data)
+		else:
+			self.wfile.write(data)
 		if quit:
-			sys.exit(0)
+			self.server.shutdown()
 
-	do_POST = do_GET
+	def do_POST(self):
+		"""Answer as GET after consuming the request body to keep the
+		connection usable."""
+		n = int(self.headers.get("Content-Length", 0))
+		if n > 0:
+			self.rfile.read(n)
+		self.do_GET()
 
 	def log_error(self, fmt, *args):
 		BaseHTTPRequestHandler.log_message(self, fmt % args)
@@ -1546,6 +3792,419 @@ class Handler(BaseHTTPRequestHandler):
 		pass
 
 
+######### Watch mode #########
+
+EVENT_PING = 15
+WATCH_PERIOD = 1.
+WATCH_DELAY = .5
+
+class EventQueue:
+	"""Events sent to the browsers. Each event is a pair (kind, data)
+	and is numbered by a version."""
+
+	def __init__(self, size = 16):
+		self.cond = Condition()
+		self.version = 0
+		self.events = collections.deque(maxlen = size)
+
+	def post(self, kind, data = ""):
+		with self.cond:
+			self.version = self.version + 1
+			self.events.append((self.version, kind, data))
+			self.cond.notify_all()
+
+	def wait(self, version, timeout):
+		"""Wait for events posted after the given version. Return the
+		last version and the list of new events (empty after timeout)."""
+		with self.cond:
+			if self.version == version:
+				self.cond.wait(timeout)
+			return self.version, [(k, d) for (v, k, d) in self.events if v > version]
+
+EVENTS = EventQueue()
+TASK_LOCK = RWLock()
+
+
+def inotify_open(path):
+	"""Open an inotify descriptor watching the given directory.
+	Return None if inotify is not available."""
+	try:
+		import ctypes
+		import ctypes.util
+		libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno = True)
+		fd = libc.inotify_init1(os.O_NONBLOCK)
+		if fd < 0:
+			return None
+		# IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+		if libc.inotify_add_watch(fd, os.fsencode(path), 0x2 | 0x8 | 0x80 | 0x100 | 0x200) < 0:
+			os.close(fd)
+			return None
+		return fd
+	except (OSError, AttributeError, TypeError):
+		return None
+
+
+class Watcher(Thread):
+	"""Thread watching the CSV files of the task directory and reloading
+	the changed ones. inotify is used, when available, to be woken up;
+	otherwise the directory is polled."""
+
+	def __init__(self, path):
+		Thread.__init__(self, daemon = True)
+		self.path = path
+		self.files = self.scan()
+		self.fd = inotify_open(path)
+
+	def scan(self):
+		"""Get the modification time and size of the task files."""
+		files = {}
+		for name in os.listdir(self.path):
+			if uncompressed_name(name).endswith(".csv"):
+				try:
+					st = os.stat(os.path.join(self.path, name))
+					files[name] = (st.st_mtime_ns, st.st_size)
+				except OSError:
+					pass
+		return files
+
+	def wait(self):
+		"""Wait for a possible change in the directory."""
+		if self.fd == None:
+			time.sleep(WATCH_PERIOD)
+		else:
+			select.select([self.fd], [], [])
+
+			# let the writer finish before scanning
+			while select.select([self.fd], [], [], WATCH_DELAY)[0] != []:
+				try:
+					while os.read(self.fd, 4096):
+						pass
+				except BlockingIOError:
+					pass
+
+	def run(self):
+		while True:
+			self.wait()
+			files = self.scan()
+			if files != self.files:
+				changed = [f for f in files if files[f] != self.files.get(f)]
+				removed = [f for f in self.files if f not in files]
+				self.files = files
+				try:
+					reload_task(changed, removed)
+				except Exception as e:
+					warn("cannot reload %s: %s" % (self.path, e))
+
+
+def reload_task(changed, removed):
+	"""Reload the task after the files in changed have been created or
+	modified and the files in removed have been deleted."""
+	global TASK
+	changed = [uncompressed_name(f) for f in changed]
+	removed = [uncompressed_name(f) for f in removed]
+	known = [os.path.basename(v.path) for v in TASK.views] \
+		+ [os.path.basename(s.path) for s in TASK.stats] + ["cfg.csv"]
+
+	# structure change: reload everything
+	if "cfg.csv" in changed or removed != [] \
+	or [f for f in changed if f not in known] != []:
+		info("reloading task")
+		task = load_task(*TASK_ARGS)
+		TASK_LOCK.acquire_write()
+		TASK = task
+		RENDER_CACHE.clear()
+		RENDER_LEVELS.clear()
+		TASK_LOCK.release_write()
+		EVENTS.post("task")
+		if WARMUP_COUNT:
+			Thread(target=partial(warm_up, task), daemon=True).start()
+		return
+
+	# reload changed views and statistics
+	TASK_LOCK.acquire_write()
+	try:
+		reload_stats = False
+		for f in changed:
+			i = TASK.find_view(os.path.join(TASK.path, f))
+			if i != None:
+				info("reloading view %s" % f)
+				TASK.views[i].reload()
+				TASK.reset_listings()
+				RENDER_CACHE.clear(lambda k: (k[2] & (1 << i)) != 0)
+				if TASK.views[i] == TASK.sview:
+					reload_stats = True
+		for s in TASK.stats:
+			if reload_stats or os.path.basename(s.path) in changed:
+				info("reloading statistics %s" % s.name)
+				s.reload()
+				RENDER_CACHE.clear()
+	finally:
+		TASK_LOCK.release_write()
+	EVENTS.post("update")
+
+
+######### Warm-up #########
+
+WARMUP_COUNT = 0
+WARMUP_VMASK = None
+WARMUP_BUDGET = 60.
+WARMUP_IDLE = .2
+
+class Activity:
+	"""Count of the user requests being processed, used by background
+	work to wait for the server to be idle."""
+
+	def __init__(self):
+		self.cond = Condition()
+		self.count = 0
+		self.last = 0
+
+	def enter(self):
+		with self.cond:
+			self.count = self.count + 1
+
+	def leave(self):
+		with self.cond:
+			self.count = self.count - 1
+			self.last = time.monotonic()
+			self.cond.notify_all()
+
+	def wait_idle(self, delay):
+		"""Wait until no request has been processed for delay seconds."""
+		with self.cond:
+			while True:
+				if self.count != 0:
+					self.cond.wait()
+				else:
+					t = self.last + delay - time.monotonic()
+					if t <= 0:
+						return
+					self.cond.wait(t)
+
+ACTIVITY = Activity()
+
+
+def warmup_cfgs(task, n):
+	"""Get the CFGs to render in advance: the entry CFG (the first one),
+	the n CFGs with the biggest values of the first statistics and the
+	CFGs they call directly."""
+	cfgs = task.cfgs[:1]
+	if task.stats != []:
+		stat = task.stats[0]
+		stat.ensure_load()
+		cfgs.extend(g for g in heapq.nlargest(n, task.cfgs, key = lambda g: g.sum.get_val(stat))
+			if g.sum.get_val(stat) != 0)
+	for g in list(cfgs):
+		cfgs.extend(v.callee for v in g.verts if v.type == BLOCK_CALL and v.callee != None)
+	return list(dict.fromkeys(cfgs))
+
+
+def warm_up(task):
+	"""Render in background, with the default view mask, the CFGs the
+	user is likely to open first so that they are in the render cache.
+	A CFG is rendered only when no request is being processed and the
+	warm-up stops after WARMUP_BUDGET seconds or if the task is
+	reloaded."""
+	start = time.monotonic()
+	query = {"vmask": str(WARMUP_VMASK) if WARMUP_VMASK != None else get_view_mask()}
+	if VIEW_LAYERS:
+		query["layers"] = "1"
+	n = 0
+	for g in warmup_cfgs(task, WARMUP_COUNT):
+		ACTIVITY.wait_idle(WARMUP_IDLE)
+		if time.monotonic() - start > WARMUP_BUDGET:
+			break
+		TASK_LOCK.acquire_read()
+		try:
+			if TASK != task:
+				break
+			do_function([str(g.id)], query)
+			WARMUP_RENDERS.inc()
+			n = n + 1
+		except Exception as e:
+			warn("warm-up of CFG %s failed: %s" % (g.label, e))
+		finally:
+			TASK_LOCK.release_read()
+	if DEBUG:
+		info("warm-up: %d CFG(s) rendered in %.1f s." % (n, time.monotonic() - start))
+
+
+######### Static export #########
+
+EXPORT_MANIFEST = ".obviews-export.json"
+EXPORT_HOTSPOTS = 20
+
+def export_name(path, query):
+	"""Name of the file storing the answer to the request made of path
+	and query in a static export (see static_url() in obviews.js)."""
+	name = path.strip("/")
+	for (k, v) in sorted(query.items()):
+		name = "%s,%s=%s" % (name, k, v)
+	return "data/" + name.replace("..", "__")
+
+
+class Exporter:
+	"""Write the files of a static export in a directory. The content
+	hash of each file is recorded in a manifest so that unchanged files
+	are neither rewritten nor, for CFGs, rendered again."""
+
+	def __init__(self, path):
+		self.path = path
+		self.old = {}
+		self.hashes = {}
+		self.written = 0
+		self.skipped = 0
+		try:
+			with open(os.path.join(path, EXPORT_MANIFEST)) as input:
+				self.old = json.load(input)
+		except (OSError, ValueError):
+			pass
+
+	def current(self, names):
+		"""Return the hash of the given files if they are all present
+		with the same hash, None else."""
+		hash = self.old.get(names[0])
+		for name in names:
+			if self.old.get(name) != hash \
+			or not os.path.exists(os.path.join(self.path, name)):
+				return None
+		return hash
+
+	def write(self, name, data, hash = None):
+		"""Write the data to the named file. If data is None, the file
+		is considered as up to date. If no hash is given, it is computed
+		from the data."""
+		if hash == None:
+			import hashlib
+			hash = hashlib.sha1(data).hexdigest()
+		self.hashes[name] = hash
+		if data == None or self.current([name]) == hash:
+			self.skipped = self.skipped + 1
+			return
+		path = os.path.join(self.path, name)
+		os.makedirs(os.path.dirname(path), exist_ok = True)
+		with open(path, "wb") as out:
+			out.write(data)
+		self.written = self.written + 1
+
+	def request(self, path, query = {}):
+		"""Export the answer to the given request."""
+		comps = path.split("/", 2)
+		(code, headers, data) = DO_MAP[comps[1]](comps[2:], query)
+		self.write(export_name(path, query), data)
+
+	def close(self):
+		"""Remove the files of the previous export that are no more
+		produced and write the manifest."""
+		for name in self.old:
+			if name not in self.hashes:
+				try:
+					os.remove(os.path.join(self.path, name))
+				except OSError:
+					pass
+		with open(os.path.join(self.path, EXPORT_MANIFEST), "w") as out:
+			json.dump(self.hashes, out)
+
+
+def export_cfg(kind, id, vmask, old):
+	"""Render a CFG for the export (run in a worker process). Return
+	the hash of the dot text and the SVG or None if the hash is old."""
+	import hashlib
+	if kind == "function":
+		g = TASK.cfgs[id]
+		sdec = StatDecorator(TASK)
+	else:
+		f = TASK.cfgs[id].function
+		g = f.get_cfg()
+		sdec = MergedStatDecorator(TASK, f)
+	out = StringBuffer()
+	g.gen(make_decorator({"vmask": str(vmask)}, sdec), out)
+	dot = out.to_str()
+	hash = hashlib.sha1(dot.encode("utf-8")).hexdigest()
+	if hash == old:
+		return hash, None
+	svg = render_svg(dot)
+	return hash, svg if svg != None else render_error()
+
+
+def make_pool(jobs):
+	"""Build the pool of workers to render CFGs. Workers are forked
+	to share the loaded task; threads are used if fork is not available."""
+	import concurrent.futures
+	import multiprocessing
+	try:
+		return concurrent.futures.ProcessPoolExecutor(jobs,
+			mp_context = multiprocessing.get_context("fork"))
+	except ValueError:
+		return concurrent.futures.ThreadPoolExecutor(jobs)
+
+
+def export_task(path, masks, jobs):
+	"""Export the task as a static site in the given directory: every
+	source, every statistics payload and every CFG for each view mask."""
+	global TASK
+	global EXPORT
+	import concurrent.futures
+	TASK = load_task(*TASK_ARGS)
+	EXPORT = True
+	if masks == None:
+		masks = [int(get_view_mask())]
+	exp = Exporter(path)
+
+	# page and resources
+	for f in os.listdir(DATA_DIR):
+		if f != "index.html":
+			with open(os.path.join(DATA_DIR, f), "rb") as input:
+				exp.write(f, input.read())
+	exp.write("index.html", preprocess(os.path.join(DATA_DIR, "index.html"), INDEX_MAP))
+
+	# sources and contexts
+	srcs = list(TASK.get_sources())
+	for src in srcs:
+		exp.request("/source/" + src.name)
+	for g in TASK.cfgs:
+		exp.request("/context", {"id": str(g.id)})
+
+	# statistics
+	for i in range(1, len(TASK.stats) + 1):
+		q = {"stat": str(i)}
+		exp.request("/stat-info", q)
+		exp.request("/flame", q)
+		for by in ["block", "line", "function"]:
+			exp.request("/hotspots", {"stat": str(i), "k": str(EXPORT_HOTSPOTS), "by": by})
+		for g in TASK.cfgs:
+			q = {"stat": str(i), "id": str(g.id)}
+			exp.request("/function-stat", q)
+			exp.request("/function-merged-stat", q)
+		for src in srcs:
+			exp.request("/source-stat", {"stat": str(i), "id": src.name})
+
+	# CFG renders (views loaded before forking the workers)
+	for i in range(0, len(TASK.views)):
+		if any(m & (1 << i) for m in masks):
+			TASK.views[i].ensure_data()
+	renders = []
+	for m in masks:
+		for g in TASK.cfgs:
+			renders.append(("function", g.id, m,
+				[export_name("/function/%d" % g.id, {"vmask": str(m)})]))
+		for f in TASK.functions.values():
+			renders.append(("function-merged", f.cfgs[0].id, m,
+				[export_name("/function-merged/%d" % g.id, {"vmask": str(m)}) for g in f.cfgs]))
+	with make_pool(jobs) as pool:
+		futures = {
+			pool.submit(export_cfg, kind, id, m, exp.current(names)): names
+			for (kind, id, m, names) in renders
+		}
+		for future in concurrent.futures.as_completed(futures):
+			(hash, data) = future.result()
+			for name in futures[future]:
+				exp.write(name, data, hash)
+
+	exp.close()
+	info("exported to %s: %d files written, %d unchanged" % (path, exp.written, exp.skipped))
+
+
 ######### Start-up #########
 
 BROWSERS = [
@@ -1558,6 +4217,9 @@ def open_browser(port, debug = False):
 	time.sleep(.5)
 	addr = "http://localhost:%d" % port
 
+	import subprocess
+	import webbrowser
+
 	# debug mode
 	if debug:
 		webbrowser.open(addr)
@@ -1574,15 +4236,171 @@ def open_browser(port, debug = False):
 	webbrowser.open("http://localhost:%d" % port, new=1)
 
 
+def list_files(path, suffix):
+	"""List the files of the directory whose name ends with suffix,
+	possibly compressed (the returned paths are without the compression
+	extension)."""
+	names = set()
+	for f in os.listdir(path):
+		if f.endswith(".zst") and ".zst" not in get_compressions():
+			if f[:-4].endswith(suffix):
+				warn("%s ignored: zstandard module is not available." % f)
+		else:
+			names.add(uncompressed_name(f))
+	return [os.path.join(path, f) for f in sorted(names) if f.endswith(suffix)]
+
+
+def load_view(task, path):
+	"""Load the view from the given path."""
+	try:
+		cls = SPECIAL_VIEWS[os.path.basename(path)[:-9]]
+	except KeyError:
+		cls = View
+	return cls(path, task)
+
+
+class Progress:
+	"""Progress of the task loading performed in background."""
+
+	def __init__(self):
+		self.phase = "cfg"
+		self.csv = None
+		self.cfg_size = 0
+		self.cfg_read = 0
+		self.view_count = 0
+		self.views = 0
+		self.stat_count = 0
+		self.stats = 0
+		self.error = None
+
+	def start_cfg(self, csv, size):
+		self.csv = csv
+		self.cfg_size = size
+
+	def publish(self, task):
+		"""Make the task available to the requests once its structure
+		has been loaded."""
+		global TASK
+		self.cfg_read = self.cfg_size
+		self.csv = None
+		TASK = task
+
+	def fail(self, msg):
+		self.phase = "error"
+		self.error = msg
+
+	def to_json(self):
+		csv = self.csv
+		return {
+			"phase":	self.phase,
+			"cfg":		[csv.tell() if csv != None else self.cfg_read, self.cfg_size],
+			"views":	[self.views, self.view_count],
+			"stats":	[self.stats, self.stat_count],
+			"error":	self.error
+		}
+
+PROGRESS = None
+
+
+def load_task(exe, name, path, source, baseline = None, runs = None, progress = None):
+	"""Load the task, its views and its statistics. If run task
+	directories are given, the aggregations of the statistics over the
+	task and these runs are added as statistics of the task. If a
+	baseline task directory is given, the differences with its
+	statistics are added as statistics of the task. If a progress is given, it is kept
+	informed of the loading and publishes the task as soon as its
+	structure is available."""
+	views = list_files(path, "-view.csv")
+	stats = list_files(path, "-stat.csv")
+	if progress != None:
+		progress.view_count = len(views)
+		progress.stat_count = len(stats)
+	task = Task(exe, name, path, source, progress)
+	task.timings.append(("cfg", task.read_time))
+
+	# load views
+	for s in views:
+		load_view(task, s)
+	task.sort_views()
+	if progress != None:
+		progress.phase = "views"
+		progress.publish(task)
+	if task.sview != None:
+		task.sview.ensure_data()
+		task.timings.append(("view " + task.sview.name, task.sview.load_time))
+	t = time.perf_counter()
+	task.resolve_contexts()
+	task.timings.append(("sources", time.perf_counter() - t))
+	if progress != None:
+		progress.views = len(views)
+		progress.phase = "stats"
+
+	# load statistics
+	for s in stats:
+		stat = Statistic(task, os.path.basename(s)[:-4], s)
+		stat.ensure_load()
+		task.timings.append(("stat " + stat.name, stat.load_time))
+		if progress != None:
+			progress.stats = progress.stats + 1
+
+	# aggregate the runs
+	if runs:
+		t = time.perf_counter()
+		rset = RunSet(task, runs)
+		for s in list(task.stats):
+			for op in AGGREGATES:
+				AggregateStatistic(rset, s, op).ensure_load()
+		task.timings.append(("runs", time.perf_counter() - t))
+
+	# compare with the baseline
+	if baseline != None:
+		t = time.perf_counter()
+		base = load_task(exe, name, baseline, source)
+		bstats = {s.name: s for s in base.stats}
+		for s in list(task.stats):
+			if s.name in bstats:
+				DeltaStatistic(task, s, bstats[s.name]).ensure_load()
+		task.timings.append(("baseline", time.perf_counter() - t))
+
+	if progress != None:
+		progress.phase = "ready"
+	return task
+
+
+def start_task(watch):
+	"""Load the task in background."""
+	try:
+		task = load_task(*TASK_ARGS, progress = PROGRESS)
+		if PROFILE_DIR != None:
+			write_startup_profile(task)
+		if watch:
+			Watcher(task.path).start()
+		if WARMUP_COUNT:
+			warm_up(task)
+	except (FatalError, OSError) as e:
+		error(str(e))
+		PROGRESS.fail(str(e))
+
+
 def main():
 	global APPLICATION
 	global DATA_DIR
 	global DOT_PATH
 	global SOURCE_MANAGER
 	global STATS
-	global TASK
+	global TASK_ARGS
+	global WATCH
+	global PROGRESS
+	global PROFILE_DIR
+	global PROFILE_SAMPLE
 	global DEBUG
 	global PORT
+	global LOD_THRESHOLD
+	global RENDER_TIMEOUT
+	global VIEW_LAYERS
+	global WARMUP_COUNT
+	global WARMUP_VMASK
+	global WARMUP_BUDGET
 
 	# check for dot
 	DOT_PATH = shutil.which("dot")
@@ -1604,6 +4422,37 @@ def main():
 	parser.add_argument("--port", type=int, default='0',
 		help="Specify which port to use.")
 	parser.add_argument("--datadir", type=str, default=None)
+	parser.add_argument("--view-layers", action="store_true",
+		help="Render all views of a CFG once and toggle them in the browser.")
+	parser.add_argument("--render-timeout", type=float, default=RENDER_TIMEOUT, metavar="S",
+		help="Degrade CFG rendering when dot takes more than S seconds (0 to disable).")
+	parser.add_argument("--lod-threshold", type=int, default=LOD_THRESHOLD, metavar="N",
+		help="Display CFGs with more than N blocks as coarse graphs (0 to disable).")
+	parser.add_argument("--baseline", type=str, default=None, metavar="DIR",
+		help="Compare the statistics with the task directory DIR (as produced by owcet --stats).")
+	parser.add_argument("--run", type=str, action="append", default=[], metavar="DIR",
+		help="Aggregate the statistics with the ones of the task directory DIR "
+			"produced by another run on the same executable (repeatable).")
+	parser.add_argument("--warmup", type=int, default=0, metavar="N",
+		help="After loading, render in background the entry CFG, the N CFGs with "
+			"the biggest values of the first statistics and their callees.")
+	parser.add_argument("--warmup-vmask", type=lambda x: int(x, 0), default=None, metavar="MASK",
+		help="View mask of the warm-up renderings (default source view).")
+	parser.add_argument("--warmup-budget", type=float, default=WARMUP_BUDGET, metavar="S",
+		help="Stop the warm-up after S seconds (default %s)." % WARMUP_BUDGET)
+	parser.add_argument("--watch", action="store_true",
+		help="Reload the task when its files are rewritten.")
+	parser.add_argument("--export", type=str, default=None, metavar="DIR",
+		help="Export the task as a static site in DIR instead of serving it.")
+	parser.add_argument("--export-vmask", type=str, default=None, metavar="MASKS",
+		help="Comma-separated view masks of the exported CFGs (default source view).")
+	parser.add_argument("--jobs", "-j", type=int, default=None,
+		help="Number of processes rendering CFGs in export.")
+	parser.add_argument("--profile", type=str, default=None, metavar="DIR",
+		help="Write start-up timings and request profiles to DIR.")
+	parser.add_argument("--profile-sample", type=int, default=0, metavar="N",
+		help="With --profile, profile one request over N (in debug mode, "
+			"requests with profile=1 query are also profiled).")
 	args = parser.parse_args()
 	if args.debug:
 		DEBUG = True
@@ -1613,6 +4462,12 @@ def main():
 		serve = True
 		print("INFO: server mode enabled.")
 	PORT = args.port
+	LOD_THRESHOLD = args.lod_threshold
+	RENDER_TIMEOUT = args.render_timeout
+	VIEW_LAYERS = args.view_layers
+	WARMUP_COUNT = args.warmup
+	WARMUP_VMASK = args.warmup_vmask
+	WARMUP_BUDGET = args.warmup_budget
 
 	# find resources
 	if args.datadir:
@@ -1639,33 +4494,33 @@ def main():
 	task_dir = os.path.join(exe_dir, exe_name + "-otawa", task_name)
 	if not os.path.exists(task_dir):
 		fatal("No statistics for %s task %s. (%s)\nDid you forget --stats option in owcet?" % (args.executable, task_name, task_dir))
-	TASK = Task(args.executable, task_name, task_dir, args.source)
-
-	# load views
-	for s in glob.glob(os.path.join(task_dir, "*-view.csv")):
-		try:
-			cls = SPECIAL_VIEWS[os.path.basename(s)[:-9]]
-		except KeyError:
-			cls = View
-		view = cls(s, TASK)
-	if hasattr(TASK, 'sview') and TASK.sview != None:
-		TASK.sview.ensure_data()
-	TASK.views.sort(key = lambda v: v.priority(), reverse=True)
-	for i in range(0, len(TASK.views)):
-		TASK.views[i].level = i
-
-	# load statistics
-	for s in glob.glob(os.path.join(task_dir, "*-stat.csv")):
-		stat = Statistic(TASK, os.path.basename(s)[:-4], s)
-		stat.ensure_load()
+	if args.profile:
+		PROFILE_DIR = args.profile
+		PROFILE_SAMPLE = args.profile_sample
+		os.makedirs(PROFILE_DIR, exist_ok = True)
+	if args.baseline and not os.path.isdir(args.baseline):
+		fatal("baseline task directory %s does not exist" % args.baseline)
+	for run in args.run:
+		if not os.path.isdir(run):
+			fatal("run task directory %s does not exist" % run)
+	TASK_ARGS = (args.executable, task_name, task_dir, args.source, args.baseline, args.run)
+	if args.export:
+		masks = None
+		if args.export_vmask:
+			masks = [int(m, 0) for m in args.export_vmask.split(",")]
+		export_task(args.export, masks, args.jobs)
+		return
+	WATCH = args.watch
+	PROGRESS = Progress()
+	Thread(target=partial(start_task, args.watch), daemon=True).start()
 
 	# start browser and server
-	with HTTPServer(("0.0.0.0", PORT), Handler) as server:
+	with ThreadingHTTPServer(("0.0.0.0", PORT), Handler) as server:
 		port = server.server_address[1]
 		if DEBUG or serve:
 			print("INFO: listening to http://localhost:%d" % port)
 		if not serve:
-			Thread(target=partial(open_browser, port, DEBUG)).start()
+			Thread(target=partial(open_browser, port, DEBUG), daemon=True).start()
 		server.serve_forever()
 
 if __name__ == "__main__":
@@ -32,6 +32,9 @@ var MAIN = {
 	stat_name:	"",
 	vmask:		0,
 	ovmask:		0,
+	merged:		false,
+	focus:		null,
+	lod:		{ mode: null, expand: [], focus: null, hops: 2 },
 	stack:		[],
 	code: 		null
 };
@@ -40,12 +43,32 @@ var HOST = window.location.host;
 
 /****** Convenient functions ******/
 
+// file of a static export storing the answer to a request
+// (see export_name() in obviews.py)
+function static_url(url) {
+	let path = url.toString().substring(`http://${HOST}/`.length);
+	let i = path.indexOf("?");
+	let name = i < 0 ? path : path.substring(0, i);
+	if(i >= 0) {
+		let params = Array.from(new URLSearchParams(path.substring(i + 1)).entries());
+		params.sort((a, b) => a[0] < b[0] ? -1 : 1);
+		for(let [k, v] of params)
+			name += `,${k}=${v}`;
+	}
+	name = "data/" + name.replaceAll("..", "__");
+	return name.split("/").map(encodeURIComponent).join("/");
+}
+
 function ajaxGet(url, callback) {
+    if(STATIC)
+        url = static_url(url);
     var req = new XMLHttpRequest();
     req.open("GET", url);
     req.addEventListener("load", function(){
         if(req.status >= 200 && req.status < 400)
             callback(req.responseText);
+        else if(STATIC && req.status == 404)
+            display_info("<b>Not available in this export.</b>");
         else
             console.error("req.status: " + req.status + " " + req.statusText + " " + url);
     });
@@ -182,57 +205,19 @@ function cfg_zoom(isZoomingIn=true, mouseEvt) {
 
 // center on a given block from a qml call
 function cfg_center_block_qt_event(block_addr) {
-	var idx = BB_map.get(block_addr)[1];
-	var name = BB_map.get(block_addr)[0];
-	if (MAIN.id != idx) {
-		MAIN.stack = [];
-		MAIN.id = idx;
-		MAIN.name = name;
-		display_in_code(`Loading function ${name}`);
-		var url = `http://${HOST}/function/${idx}?vmask=${MAIN.vmask}`;
-		var req = new XMLHttpRequest();
-		req.open("GET", url);
-		req.addEventListener("load", function () {
-			if (req.status >= 200 && req.status < 400) {
-				display_function(req.responseText);
-				setTimeout(() => { cfg_center_block_by_address(block_addr) }, 100);
-			}
-			else {
-				console.error("req.status: " + req.status + " " + req.statusText + " " + url);
-			}
-		});
-		req.addEventListener("error", function () {
-			console.error("Error with URL " + url);
-		});
-		req.send(null);
-	}
-	else {
-		cfg_center_block_by_address(block_addr);
-	}
-}
-
-// center on a given block by its address of type int (Hex)
-function cfg_center_block_by_address(block_addr) {
-	const addrTitleRegex = new RegExp("(?<addr>[0-9a-fA-F]+):");
-	// browse all node to find the one with an address equal to the input
-	var allNode = document.getElementsByClassName("node");
-	for (let node of allNode) {
-		// extract address from BB title
-		var nodeTitle = node.getElementsByTagName('text')[0].innerHTML;
-		var found = nodeTitle.match(addrTitleRegex);
-		if (found !== null) {
-			var nodeAddr = found.groups["addr"];
-			// check if node address equal to the input address
-			if (block_addr == parseInt(nodeAddr, 16)) {
-				var block = node;
-				break;
-			}
+	let cfg = MAIN.mode == MODE_FUNCTION ? `&cfg=${MAIN.id}` : "";
+	ajaxGet(`http://${HOST}/locate?addr=${block_addr}${cfg}`, function(answer) {
+		let r = JSON.parse(answer);
+		if(r.blocks.length == 0)
+			return;
+		let b = r.blocks[0];
+		if(MAIN.mode != MODE_FUNCTION || MAIN.id != b.cfg)
+			open_function(b.cfg, b.label, b.block);
+		else {
+			CFG.bb_focus = true;
+			cfg_center_block_by_id(b.node);
 		}
-	}
-	if (!Object.is(block, null)) {
-		CFG.bb_focus = true;
-		cfg_center_block(block);
-	}
+	});
 }
 
 // center on a given block by its ID
@@ -309,6 +294,25 @@ function display_info(answer) {
 	t.innerHTML = answer;
 }
 
+function stat_is_delta() {
+	let s = document.getElementById("stat");
+	return s.options[MAIN.stat].dataset.delta == "1";
+}
+
+function stat_is_categorical() {
+	let s = document.getElementById("stat");
+	return s.options[MAIN.stat].dataset.categorical == "1";
+}
+
+function stat_color(x, max) {
+	if(stat_is_categorical())
+		return RUN_COLORS[(x - 1) % RUN_COLORS.length];
+	if(!stat_is_delta())
+		return COLORS[Math.floor((x - 1) * COLORS.length / max)];
+	let cs = DIFF_COLORS[x < 0 ? 0 : 1];
+	return cs[Math.floor((Math.abs(x) - 1) * cs.length / max)];
+}
+
 function display_stat(answer) {
 	let a = answer.split(" ");
 
@@ -319,12 +323,10 @@ function display_stat(answer) {
 		let a = answer.split(" ");
 		t.children[0].children[2].innerHTML = MAIN.stat_name;
 		let max = parseInt(a[1]);
-		let n = COLORS.length;
 		for(let i = 2; i < a.length; i += 2) {
 			let l = parseInt(a[i]);
 			let x = parseInt(a[i + 1]);
-			let c = Math.floor((x - 1) * n / max);
-			t.children[l].style.backgroundColor = COLORS[c];
+			t.children[l].style.backgroundColor = stat_color(x, max);
 			t.children[l].children[2].innerHTML = "" + x;
 		}
 	}
@@ -336,9 +338,10 @@ function display_stat(answer) {
 		for(let i = 1; i < a.length; i+= 2) {
 			let n = parseInt(a[i]);
 			let g = document.getElementById("node" + (n + 1));
+			if(g == null)
+				continue;
 			let x = parseInt(a[i + 1]);
-			let c = Math.floor((x - 1) * COLORS.length / max);
-			fill_node(g, COLORS[c]);
+			fill_node(g, stat_color(x, max));
 		}
 	}
 
@@ -366,6 +369,8 @@ function show_stat(stat, name) {
 	else if(MAIN.mode == MODE_FUNCTION) {
 		if(stat == 0)
 			clear_function_stat();
+		else if(MAIN.merged)
+			cmd = "function-merged-stat";
 		else
 			cmd = "function-stat";
 	}
@@ -380,6 +385,19 @@ function show_stat(stat, name) {
 }
 
 
+function display_hotspots(answer) {
+	var t = document.getElementById("hotspots");
+	if(t != null)
+		t.innerHTML = answer;
+}
+
+function show_hotspots(by) {
+	ajaxGet(
+		`http://${HOST}/hotspots?stat=${MAIN.stat}&k=20&by=${by}`,
+		display_hotspots);
+}
+
+
 /****** Function display ******/
 
 function display_context(answer) {
@@ -388,6 +406,10 @@ function display_context(answer) {
 }
 
 function show_context() {
+	if(MAIN.merged) {
+		display_context(`${MAIN.name} (all contexts)`);
+		return;
+	}
 	ajaxGet(
 		`http://${HOST}/context?id=${MAIN.id}`,
 		display_context
@@ -453,18 +475,79 @@ function display_function(answer) {
 	show_context();
 	if(MAIN.stat != 0)
 		show_stat(MAIN.stat, MAIN.stat_name);
+	if(LAYERS)
+		show_layers();
+
+	// focus on a block if required
+	// (if hidden in a coarse graph, display its neighbourhood)
+	if(MAIN.focus != null) {
+		let focus = MAIN.focus;
+		let block = document.getElementById("node" + (focus + 1));
+		MAIN.focus = null;
+		if(block != null) {
+			CFG.bb_focus = true;
+			cfg_center_block(block);
+		}
+		else if(!STATIC && MAIN.lod.mode == null)
+			lod_focus(focus);
+	}
 }
 
 function show_function(num, name) {
 	MAIN.id = num;
  	MAIN.name = name;
 	display_in_code(`Loading function ${name}`);
+	let cmd = MAIN.merged ? "function-merged" : "function";
 	ajaxGet(
-		`http://${HOST}/function/${num}?vmask=${MAIN.vmask}`,
+		`http://${HOST}/${cmd}/${num}?vmask=${MAIN.vmask}${lod_query()}${LAYERS ? "&layers=1" : ""}`,
 		display_function
 	);
 }
 
+
+/****** Level of detail ******/
+
+function lod_query() {
+	let l = MAIN.lod;
+	if(l.mode == null)
+		return "";
+	let q = `&lod=${l.mode}`;
+	if(l.mode == "coarse" && l.expand.length != 0)
+		q += `&expand=${l.expand.join(",")}`;
+	else if(l.mode == "focus")
+		q += `&focus=${l.focus}&hops=${l.hops}`;
+	return q;
+}
+
+function lod_reset() {
+	MAIN.lod = { mode: null, expand: [], focus: null, hops: 2 };
+}
+
+function lod_set(mode) {
+	MAIN.lod.mode = mode;
+	MAIN.lod.expand = [];
+	show_function(MAIN.id, MAIN.name);
+}
+
+function lod_expand(region) {
+	MAIN.lod.mode = "coarse";
+	MAIN.lod.expand.push(region);
+	MAIN.focus = region;
+	show_function(MAIN.id, MAIN.name);
+}
+
+function lod_focus(block) {
+	MAIN.lod.mode = "focus";
+	MAIN.lod.focus = block;
+	MAIN.focus = block;
+	show_function(MAIN.id, MAIN.name);
+}
+
+function lod_hops(n) {
+	MAIN.lod.hops += n;
+	show_function(MAIN.id, MAIN.name);
+}
+
 function find_option_index_by_text(selectId, text) {
     var selectElement = document.getElementById(selectId);
     for (var i = 0; i < selectElement.options.length; i++) {
@@ -527,9 +610,24 @@ function display_source(response) {
 
 	if(MAIN.stat != 0)
 		show_stat(MAIN.stat, MAIN.stat_name);
+
+	// focus on a line if required
+	if(MAIN.focus != null) {
+		let t = document.getElementById("stats").children[0];
+		if(MAIN.focus < t.childElementCount)
+			t.children[MAIN.focus].scrollIntoView({block: "center"});
+		MAIN.focus = null;
+	}
 }
 
-function show_source(path) {
+function show_line_blocks(line) {
+	ajaxGet(
+		`http://${HOST}/line-blocks?id=${encodeURIComponent(MAIN.id)}&line=${line}&stat=${MAIN.stat}`,
+		display_info);
+}
+
+function show_source(path, line = null) {
+	MAIN.focus = line;
 	display_in_code(`Loading ${path}.`);
 	MAIN.id = path;
 	MAIN.name = path;
@@ -589,6 +687,10 @@ function quit() {
 }
 
 function logOut(){
+  if(STATIC) {
+    quit();
+    return;
+  }
   let url = `http://${HOST}/stop`;
   ajaxGet(url, quit);
 }
@@ -610,6 +712,14 @@ function view_change(e, n) {
 		MAIN.vmask |= 1 << n;
 	else
 		MAIN.vmask &= ~(1 << n);
+	if(LAYERS && MAIN.mode == MODE_FUNCTION)
+		show_layers();
+}
+
+// show or hide the view lines of the displayed CFG (rendered with layers)
+function show_layers() {
+	for(let g of document.getElementsByClassName("layer"))
+		g.style.display = (MAIN.vmask & (1 << parseInt(g.dataset.layer))) ? "" : "none";
 }
 
 function view_switch() {
@@ -621,33 +731,123 @@ function view_switch() {
 		if(MAIN.vmask != MAIN.ovmask) {
 			MAIN.ovmask = MAIN.vmask;
 			//alert("view completed");
-			if(MAIN.mode == MODE_FUNCTION)
+			if(MAIN.mode == MODE_FUNCTION && !LAYERS)
 				show_function(MAIN.id, MAIN.name);
 		}
 	}
 }
 
 
-function open_function(idx, name) {
+function merge_switch(e) {
+	MAIN.merged = e.checked;
+	if(MAIN.mode == MODE_FUNCTION)
+		show_function(MAIN.id, MAIN.name);
+}
+
+
+function open_function(idx, name, block = null) {
 	MAIN.stack = []
+	MAIN.focus = block;
+	lod_reset();
 	show_function(idx, name);
 }
 
 function call_function(idx, name) {
 	MAIN.stack.push({idx: MAIN.id, name: MAIN.name});
+	lod_reset();
 	show_function(idx, name);
 }
 
 function return_function() {
 	if(MAIN.mode == MODE_FUNCTION && MAIN.stack.length >= 1) {
 		let l = MAIN.stack.pop();
+		lod_reset();
 		show_function(l.idx, l.name);
 	}
 }
 
 
+/****** Task events ******/
+
+function refresh_view() {
+	if(MAIN.mode == MODE_FUNCTION)
+		show_function(MAIN.id, MAIN.name);
+	else if(MAIN.mode == MODE_SOURCE)
+		show_source(MAIN.id);
+}
+
+function listen_events() {
+	if(typeof(EventSource) === "undefined")
+		return;
+	let events = new EventSource(`http://${HOST}/events`);
+	events.addEventListener("task", function(e) {
+		location.reload();
+	});
+	events.addEventListener("update", function(e) {
+		refresh_view();
+	});
+}
+
+
+/****** Task loading ******/
+
+function fill_part(id, part, callback = null) {
+	ajaxGet(`http://${HOST}/index-part/${part}`, function(answer) {
+		document.getElementById(id).innerHTML = answer;
+		if(callback != null)
+			callback();
+	});
+}
+
+function display_progress(answer) {
+	let s = JSON.parse(answer);
+	if(s.phase == "error") {
+		display_info(`<b>Loading failed:</b> ${s.error}`);
+		return;
+	}
+
+	// functions are available with the CFG structure
+	if(!MAIN.functions && s.phase != "cfg") {
+		MAIN.functions = true;
+		fill_part("function-list", "functions");
+		fill_part("view-menu-items", "views");
+		ajaxGet(`http://${HOST}/index-part/view-mask`, function(answer) {
+			MAIN.vmask = parseInt(answer);
+			MAIN.ovmask = MAIN.vmask;
+		});
+	}
+
+	// loading completed
+	if(s.phase == "ready") {
+		fill_part("source-list", "sources");
+		fill_part("stat", "stats");
+		display_info("");
+		return;
+	}
+
+	// display progress
+	let pc = s.cfg[1] ? Math.floor(s.cfg[0] * 100 / s.cfg[1]) : 0;
+	display_info(
+		`<b>Loading...</b><br/>` +
+		`CFG: ${pc}% (${s.cfg[0]} / ${s.cfg[1]} bytes)<br/>` +
+		`Views: ${s.views[0]} / ${s.views[1]}<br/>` +
+		`Statistics: ${s.stats[0]} / ${s.stats[1]}`);
+	setTimeout(poll_status, 250);
+}
+
+function poll_status() {
+	ajaxGet(`http://${HOST}/status`, display_progress);
+}
+
+
 /***** Initialization ******/
 MAIN.vmask = VIEW_MASK;
 MAIN.ovmask = VIEW_MASK;
 MAIN.code = document.getElementById("code");
 disable_function();
+if(WATCH)
+	listen_events();
+if(LOADING) {
+	MAIN.functions = false;
+	poll_status();
+}
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+#
+# Obviews - OTAWA Binary Viewers
+# Benchmarks of the load and render pipeline.
+#
+# This file is part of OTAWA
+# Copyright (c) 2022, IRIT UPS.
+#
+# OTAWA is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# OTAWA is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with OTAWA; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""Generate synthetic task directories (as produced by owcet -W --stats)
+and time the main steps of obviews on them. Results are output as JSON."""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OBVIEWS = os.path.join(ROOT, "bin", "obviews.py")
+
+# name: (functions, contexts per function, blocks per CFG, statistics)
+SCALES = {
+	"small":	(20, 2, 10, 2),
+	"medium":	(200, 4, 20, 3),
+	"large":	(1000, 8, 40, 4)
+}
+
+INSTS_PER_BLOCK = 4
+LINES_PER_SOURCE = 400
+
+
+######### Task generation #########
+
+def gen_task(root, funs, ctxs, blocks, stats, seed = 0):
+	"""Generate in root an executable placeholder, its sources and the
+	task directory root/bench-otawa/main. Function 0 is the entry and
+	calls each context of the other functions; each function is analysed
+	in ctxs contexts. Return the task directory."""
+	rand = random.Random(seed)
+	task_dir = os.path.join(root, "bench-otawa", "main")
+	os.makedirs(task_dir, exist_ok = True)
+	open(os.path.join(root, "bench.elf"), "w").close()
+
+	# generate sources
+	srcs = []
+	for i in range(0, max(1, funs // 10)):
+		path = os.path.join(root, "src%d.c" % i)
+		with open(path, "w") as out:
+			for l in range(0, LINES_PER_SOURCE):
+				out.write("\tx = x + %d; /* line %d */\n" % (l, l + 1))
+		srcs.append(path)
+
+	# build the CFG list: (function, context string)
+	base = lambda f: 0x10000 + f * blocks * INSTS_PER_BLOCK * 4
+	cfgs = [(0, "[]")]
+	for f in range(1, funs):
+		for c in range(0, ctxs):
+			call = base(0) + (((f - 1) * ctxs + c) % blocks) * INSTS_PER_BLOCK * 4
+			cfgs.append((f, "[FUN(%x), CALL(%x), CTX(%d)]" % (base(0), call, c)))
+
+	cfg = open(os.path.join(task_dir, "cfg.csv"), "w")
+	cfg.write("# Label: bench\n# Exec: bench.elf\n")
+	sview = open(os.path.join(task_dir, "source-view.csv"), "w")
+	dview = open(os.path.join(task_dir, "disassembly-view.csv"), "w")
+	souts = []
+	for i in range(0, stats):
+		out = open(os.path.join(task_dir, "stat%d-stat.csv" % i), "w")
+		out.write("# Label: stat %d\n# Unit: cycle\n" % i)
+		souts.append(out)
+
+	for (id, (f, ctx)) in enumerate(cfgs):
+		cfg.write("G\tf%d\t%x\t%s\n" % (f, base(f), ctx))
+		cfg.write("N\n")
+		for b in range(0, blocks):
+			addr = base(f) + b * INSTS_PER_BLOCK * 4
+			cfg.write("B\t%x\t%d\n" % (addr, INSTS_PER_BLOCK * 4))
+			src = srcs[f % len(srcs)]
+			for i in range(0, INSTS_PER_BLOCK):
+				a = addr + 4 * i
+				line = 1 + (f * blocks + b * 2 + i // 2) % LINES_PER_SOURCE
+				sview.write("%d\t%d\t%x\t%s:%d\n" % (id, b + 1, a, src, line))
+				dview.write("%d\t%d\t%x\tadd r%d, r%d, #%d\n" % (id, b + 1, a, i, i + 1, b))
+			for out in souts:
+				out.write("%d\t%x\t%d\t%s\n" % (rand.randint(1, 1000), addr, INSTS_PER_BLOCK * 4, ctx))
+		ncalls = len(cfgs) - 1 if id == 0 else 0
+		for c in range(1, ncalls + 1):
+			cfg.write("C\t%d\n" % c)
+		cfg.write("X\n")
+
+		# edges: chain of blocks with some back edges, then calls, then exit
+		exit = blocks + ncalls + 1
+		cfg.write("E\t0\t1\t\n")
+		for b in range(1, blocks):
+			cfg.write("E\t%d\t%d\t\n" % (b, b + 1))
+			if b % 5 == 0:
+				cfg.write("E\t%d\t%d\tT\n" % (b, b - 3))
+		last = blocks
+		for c in range(blocks + 1, blocks + ncalls + 1):
+			cfg.write("E\t%d\t%d\t\n" % (last, c))
+			last = c
+		cfg.write("E\t%d\t%d\t\n" % (last, exit))
+
+	for f in [cfg, sview, dview] + souts:
+		f.close()
+	return task_dir
+
+
+######### Timing #########
+
+def load_obviews():
+	"""Load obviews.py as a module."""
+	spec = importlib.util.spec_from_file_location("obviews", OBVIEWS)
+	mod = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(mod)
+	return mod
+
+
+def measure(fun, repeat, prepare = None):
+	"""Time fun repeat times; prepare, if any, is called untimed before
+	each run. Return the minimum and median times in seconds."""
+	ts = []
+	for i in range(0, repeat):
+		if prepare != None:
+			prepare()
+		t = time.perf_counter()
+		fun()
+		ts.append(time.perf_counter() - t)
+	ts.sort()
+	return ts[0], ts[len(ts) // 2]
+
+
+def fake_svg(g):
+	"""Build an SVG looking like dot output for the given CFG."""
+	out = ['<svg width="100pt" height="100pt">\n<g id="graph0" class="graph">\n']
+	for v in g.verts:
+		out.append('<g id="node%d" class="node">\n<title>%d</title>\n' % (v.id + 1, v.id))
+		out.append('<g id="a_node%d"><a xlink:title="&lt;TABLE&gt;">\n' % (v.id + 1))
+		out.append('<path fill="white" d="M0,0C0,0 10,10 10,10"/>\n')
+		for i in range(0, INSTS_PER_BLOCK * 2):
+			out.append('<text x="0" y="%d">%08x add r1, r2</text>\n' % (i * 10, i))
+		out.append('</a>\n</g>\n</g>\n')
+	out.append('</g>\n</svg>\n')
+	return "".join(out)
+
+
+def bench_scale(ob, name, scale, root, repeat):
+	"""Run the benchmarks for one scale and return the results."""
+	funs, ctxs, blocks, stats = scale
+	res = []
+	def record(op, times, **kw):
+		r = {"scale": name, "op": op, "min": times[0], "median": times[1]}
+		r.update(kw)
+		res.append(r)
+		sys.stderr.write("%-8s %-32s %10.4f s\n" % (name, op, times[0]))
+
+	t = time.perf_counter()
+	task_dir = gen_task(root, funs, ctxs, blocks, stats)
+	sys.stderr.write("%-8s %-32s %10.4f s\n" % (name, "(generation)", time.perf_counter() - t))
+	exe = os.path.join(root, "bench.elf")
+	sizes = {f: os.path.getsize(os.path.join(task_dir, f)) for f in os.listdir(task_dir)}
+
+	# Task.read
+	tasks = []
+	record("Task.read",
+		measure(lambda: tasks.append(ob.Task(exe, "main", task_dir, root)), repeat),
+		cfgs = len(tasks[0].cfgs), bytes = sizes["cfg.csv"])
+	task = tasks[-1]
+	del tasks[:-1]
+
+	# View.load_data
+	for f in sorted(sizes):
+		if f.endswith("-view.csv"):
+			view = ob.load_view(task, os.path.join(task_dir, f))
+			record("View.load_data(%s)" % view.name,
+				measure(view.load_data, repeat, view.read_defs),
+				bytes = sizes[f])
+			if view != task.sview:
+				record("View.build_index(%s)" % view.name,
+					measure(view.build_index, repeat), bytes = sizes[f])
+	task.sort_views()
+	task.resolve_contexts()
+
+	# Statistic.load
+	for f in sorted(sizes):
+		if f.endswith("-stat.csv"):
+			stat = ob.Statistic(task, f[:-4], os.path.join(task_dir, f))
+			def prepare():
+				task.reset_stat(stat)
+				stat.defs = None
+				stat.ensure_preload()
+			record("Statistic.load(%s)" % stat.name,
+				measure(stat.load, repeat, prepare),
+				bytes = sizes[f])
+			stat.loaded = True
+
+	# Source.gen
+	src = task.get_sources()[0]
+	record("Source.gen", measure(src.gen, repeat), lines = len(src.get_lines()))
+
+	# CFG.gen with all views and statistics
+	g = max(task.cfgs, key = lambda g: len(g.verts))
+	def gen():
+		dec = ob.SeqDecorator([ob.ViewDecorator(task.views), ob.StatDecorator(task)])
+		out = ob.StringBuffer()
+		g.gen(dec, out)
+		gen.dot = out.to_str()
+	def reset():
+		g.listing = {}
+	record("CFG.gen(cold)", measure(gen, repeat, reset), blocks = len(g.verts))
+	record("CFG.gen", measure(gen, repeat), blocks = len(g.verts))
+
+	# postprocess_svg on real dot output if available
+	dot = shutil.which("dot")
+	if dot != None:
+		svg = subprocess.run([dot, "-Tsvg"], input = gen.dot.encode(),
+			capture_output = True).stdout.decode()
+	else:
+		svg = fake_svg(g)
+	record("postprocess_svg", measure(lambda: ob.postprocess_svg(svg), repeat),
+		bytes = len(svg), dot = dot != None)
+	return res
+
+
+def bench_startup(repeat):
+	"""Time the start-up of obviews.py (interpreter and module body)."""
+	code = "import runpy; runpy.run_path(%r, run_name = 'obviews')" % OBVIEWS
+	return measure(lambda: subprocess.run([sys.executable, "-c", code], check = True), repeat)
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Benchmarks of obviews")
+	parser.add_argument("--scale", type = str, default = "small,medium",
+		help = "Comma-separated list of scales among %s." % ", ".join(SCALES))
+	parser.add_argument("--repeat", type = int, default = 3,
+		help = "Number of runs of each measure.")
+	parser.add_argument("--output", "-o", type = str, default = None,
+		help = "File to write JSON results to (default standard output).")
+	parser.add_argument("--keep", type = str, default = None,
+		help = "Directory where generated tasks are kept.")
+	parser.add_argument("--startup-budget", type = float, default = None,
+		help = "Fail if the median start-up time exceeds this budget (ms).")
+	args = parser.parse_args()
+
+	ob = load_obviews()
+	res = {
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"version": subprocess.run(["git", "describe", "--always", "--dirty"],
+			cwd = ROOT, capture_output = True).stdout.decode().strip(),
+		"date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"results": []
+	}
+
+	# start-up
+	times = bench_startup(max(args.repeat, 5))
+	res["results"].append({"scale": None, "op": "startup", "min": times[0], "median": times[1]})
+	sys.stderr.write("%-8s %-32s %10.4f s\n" % ("", "startup", times[0]))
+
+	# pipeline at each scale
+	for name in args.scale.split(","):
+		if args.keep != None:
+			root = os.path.join(args.keep, name)
+		else:
+			root = tempfile.mkdtemp(prefix = "obviews-bench-")
+		try:
+			res["results"] += bench_scale(ob, name, SCALES[name], root, args.repeat)
+		finally:
+			if args.keep == None:
+				shutil.rmtree(root)
+
+	# output results
+	if args.output != None:
+		with open(args.output, "w") as out:
+			json.dump(res, out, indent = 1)
+	else:
+		json.dump(res, sys.stdout, indent = 1)
+		sys.stdout.write("\n")
+	if args.startup_budget != None and times[1] * 1000 > args.startup_budget:
+		sys.stderr.write("ERROR: start-up takes %.1f ms, over the budget of %.1f ms\n"
+			% (times[1] * 1000, args.startup_budget))
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+# Obviews - OTAWA Binary Viewers
+# Start-up regression tests.
+#
+# This file is part of OTAWA
+# Copyright (c) 2022, IRIT UPS.
+#
+# OTAWA is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# OTAWA is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with OTAWA; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+
+"""Check that the start-up of obviews.py stays short: heavy or rarely
+used modules must not be imported by the module body and the module
+body must not take more than a budget on top of the standard modules
+it needs. Run with python3 -m unittest discover -s test (or pytest)."""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench
+
+# modules that are only imported at first use
+DEFERRED = [
+	"concurrent.futures",
+	"cProfile",
+	"ctypes",
+	"cxxfilt",
+	"filecmp",
+	"glob",
+	"gzip",
+	"hashlib",
+	"logging",
+	"multiprocessing",
+	"subprocess",
+	"tempfile",
+	"tokenize",
+	"traceback",
+	"webbrowser",
+	"zstandard"
+]
+
+# standard modules imported by the module body
+REQUIRED = "import argparse, array, bisect, collections, functools, heapq, " \
+	"io, json, operator, os, re, select, shutil, threading, time, " \
+	"urllib.parse, http.server"
+
+# budget of the module body in ms (on top of REQUIRED)
+STARTUP_BUDGET = float(os.environ.get("OBVIEWS_STARTUP_BUDGET", 100))
+
+
+def startup_modules():
+	"""Get the modules loaded after running the module body of obviews.py."""
+	code = "import runpy, sys, json; runpy.run_path(%r, run_name = 'obviews'); " \
+		"json.dump(sorted(sys.modules), sys.stdout)" % bench.OBVIEWS
+	r = subprocess.run([sys.executable, "-c", code], check = True, capture_output = True)
+	return json.loads(r.stdout)
+
+
+class StartupTest(unittest.TestCase):
+
+	def test_deferred_imports(self):
+		mods = startup_modules()
+		self.assertEqual([m for m in DEFERRED if m in mods], [])
+
+	def test_budget(self):
+		ref = bench.measure(lambda: subprocess.run([sys.executable, "-c", REQUIRED], check = True), 7)
+		time = bench.bench_startup(7)
+		self.assertLessEqual((time[0] - ref[0]) * 1000, STARTUP_BUDGET)
+
+
+if __name__ == "__main__":
+	unittest.main()